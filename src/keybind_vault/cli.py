@@ -0,0 +1,400 @@
+"""Command line entry point.
+
+Only the TUI needs Textual, so it is imported when the TUI starts and the
+other commands start without it. `lookup` runs many times a second from
+scripts, so it also skips asyncio and the stress harness.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from keybind_vault.config import Config, load_config
+from keybind_vault.db import (
+    VACUUM_STEP_PAGES,
+    KeybindOrder,
+    LockPolicy,
+    configure_locking,
+    flush_usage,
+    get_prefetch_stats,
+    initialize,
+    maintain,
+    record_usage,
+    search_keybinds,
+    sync,
+)
+from keybind_vault.db.sqlite_db import DB_PATH
+from keybind_vault.render import RENDERERS, RenderOptions, render
+from keybind_vault.snapshot import (
+    SNAPSHOT_PATH,
+    SnapshotError,
+    compile_snapshot,
+    open_snapshot,
+    refresh_snapshot,
+)
+from keybind_vault.timings import RenderMode
+
+
+async def search(args: argparse.Namespace) -> None:
+    order = KeybindOrder.FRECENCY if args.sort == "frecency" else KeybindOrder.INSERTION
+    keybinds = await search_keybinds(args.term, order=order, limit=args.limit)
+
+    for keybind in keybinds:
+        print(f"{keybind.keys}\t{keybind.description or ''}")
+
+    record_usage(keybind.id for keybind in keybinds)
+
+
+async def sync_vault(args: argparse.Namespace) -> None:
+    try:
+        report = await sync(args.target)
+    except ValueError as e:
+        raise SystemExit(f"Sync error: {e}")
+
+    print(
+        f"Sent {report.sent} changes, received {report.received} "
+        f"({report.applied} applied, {report.conflicts} conflicts)."
+    )
+    if report.pruned:
+        print(f"Pruned {report.pruned} tombstones every peer has seen.")
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024:.1f} KiB"
+
+
+def run_maintenance(args: argparse.Namespace) -> None:
+    try:
+        report = maintain(vacuum=not args.no_vacuum, step_pages=args.step_pages)
+    except sqlite3.OperationalError as e:
+        raise SystemExit(f"Maintenance error: {e}")
+
+    if args.json:
+        print(json.dumps(asdict(report), indent=2))
+        return
+
+    before, after = report.before, report.after
+    mode = after.auto_vacuum
+    if report.switched_to_incremental:
+        mode += f" (switched from {before.auto_vacuum})"
+
+    print(f"Auto vacuum: {mode}")
+    print(
+        f"Pages: {before.page_count} -> {after.page_count} "
+        f"({after.page_size} bytes each), reclaimed {report.pages_reclaimed}"
+    )
+    print(f"Free pages: {before.freelist_count} -> {after.freelist_count}")
+    print(
+        f"File size: {format_size(before.file_size)} -> {format_size(after.file_size)}"
+    )
+    print(f"Integrity: {', '.join(report.integrity) or 'not checked'}")
+    if report.error:
+        print(f"Stopped early: {report.error}")
+    print("Rows:")
+    width = max(map(len, after.row_counts), default=0)
+    for table, count in after.row_counts.items():
+        print(f"  {table:<{width}}  {count}")
+
+
+def run_render(args: argparse.Namespace) -> None:
+    options = RenderOptions(
+        format=args.format,
+        term=args.search,
+        fields=tuple(args.fields),
+        category=args.category,
+    )
+    if args.output is None:
+        render(sys.stdout, options, use_cache=not args.no_cache)
+        return
+
+    with open(args.output, "w", encoding="utf-8", newline="") as file:
+        render(file, options, use_cache=not args.no_cache)
+
+
+def run_compile(args: argparse.Namespace) -> None:
+    output = compile_snapshot(args.output)
+    print(f"Snapshot written to {output}")
+
+
+def run_stress_test(args: argparse.Namespace, config: Config) -> None:
+    from keybind_vault.stress import run_stress
+
+    defaults = config.lock_policy
+    policy = LockPolicy(
+        busy_timeout=defaults.busy_timeout
+        if args.busy_timeout is None
+        else args.busy_timeout,
+        retries=defaults.retries if args.retries is None else args.retries,
+        backoff=defaults.backoff if args.backoff is None else args.backoff,
+    )
+    report = run_stress(
+        workers=args.workers,
+        seconds=args.seconds,
+        write_ratio=args.write_ratio,
+        processes=args.processes,
+        rows=args.rows,
+        policy=policy,
+        vault=args.vault,
+    )
+
+    if args.json:
+        print(json.dumps(asdict(report) | {"throughput": report.throughput}, indent=2))
+        return
+
+    kind = "processes" if report.processes else "threads"
+    print(
+        f"Workers: {report.workers} {kind} for {report.seconds:.1f} s, "
+        f"busy timeout {policy.busy_timeout:g} s, {policy.retries} retries "
+        f"from {policy.backoff * 1000:g} ms"
+    )
+    print(
+        f"Operations: {report.reads + report.writes} ({report.throughput:.0f}/s), "
+        f"{report.reads} reads ({report.read_failed} failed), "
+        f"{report.writes} writes ({report.write_failed} failed)"
+    )
+    print(
+        f"Read latency: p50 {report.read_p50 * 1000:.2f} ms, "
+        f"p99 {report.read_p99 * 1000:.2f} ms"
+    )
+    print(
+        f"Write latency: p50 {report.write_p50 * 1000:.2f} ms, "
+        f"p99 {report.write_p99 * 1000:.2f} ms"
+    )
+    print(f"Lock retries: {report.lock_retries}, gave up: {report.lock_failures}")
+
+
+def run_tui(args: argparse.Namespace, config: Config) -> None:
+    # Textual is imported here, not at the top, see the module docstring
+    from keybind_vault.main import KeybindVaultApp
+
+    render_mode = args.render_mode or config.render_mode
+    try:
+        app = KeybindVaultApp(RenderMode(render_mode))
+    except ValueError:
+        raise SystemExit(f"Config error: unknown render mode '{render_mode}'")
+    # Locks are waited out in retries, a blocking wait would freeze the UI
+    configure_locking(config.lock_policy.for_event_loop())
+    app.run()
+
+    if args.timings:
+        print(f"Render mode: {app.render_mode.value}")
+        print(
+            f"{'Action':<8} {'Count':>5}  "
+            + "  ".join(
+                f"{column:>7}"
+                for column in ("Handler", "Refresh", "Frame", "p95", "Max")
+            )
+        )
+        for timing in app.timings.summary():
+            print(
+                f"{timing.action:<8} {timing.count:>5}  "
+                + "  ".join(
+                    f"{seconds * 1000:>5.1f}ms"
+                    for seconds in (
+                        timing.handler_median,
+                        timing.refresh_median,
+                        timing.frame_median,
+                        timing.refresh_p95,
+                        timing.refresh_max,
+                    )
+                )
+            )
+        stats = get_prefetch_stats()
+        print(
+            f"Prefetch: {stats.hits} hits, {stats.misses} misses "
+            f"({stats.hit_rate:.0%} hit rate, {stats.accuracy:.0%} of prefetches used)"
+        )
+
+
+def run_lookup(args: argparse.Namespace) -> None:
+    if not (args.snapshot or SNAPSHOT_PATH).exists() or not DB_PATH.exists():
+        # First lookup ever, or the vault was removed: set up a vault like every
+        # other command does, the snapshot is then compiled from it
+        initialize()
+
+    try:
+        snapshot = open_snapshot(args.snapshot)
+    except SnapshotError as e:
+        raise SystemExit(f"Lookup error: {e}")
+
+    with snapshot:
+        if args.category:
+            keybinds = snapshot.category(args.keys)[: args.limit]
+        elif args.prefix:
+            keybinds = snapshot.prefix(args.keys, limit=args.limit)
+        else:
+            keybinds = snapshot.lookup(args.keys)
+
+        for keybind in keybinds:
+            print(f"{keybind.keys}\t{keybind.description}\t{keybind.category}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="keybind-vault")
+    parser.add_argument(
+        "--render-mode",
+        choices=[mode.value for mode in RenderMode],
+        default=None,
+        help="TUI animations: full, performance (none) or auto (off if repaints are slow)",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long TUI actions took to show up on exit",
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    search_parser = commands.add_parser(
+        "search", help="Print keybinds whose keys or description match a term"
+    )
+    search_parser.add_argument("term")
+    search_parser.add_argument(
+        "--sort", choices=("insertion", "frecency"), default="frecency"
+    )
+    search_parser.add_argument("--limit", type=int, default=None)
+
+    sync_parser = commands.add_parser(
+        "sync", help="Exchange changes with another vault file or changeset directory"
+    )
+    sync_parser.add_argument("target", type=Path)
+
+    maintain_parser = commands.add_parser(
+        "maintain",
+        help="Reclaim free pages, refresh planner statistics and check integrity",
+    )
+    maintain_parser.add_argument(
+        "--no-vacuum", action="store_true", help="Skip reclaiming free pages"
+    )
+    maintain_parser.add_argument(
+        "--step-pages",
+        type=int,
+        default=VACUUM_STEP_PAGES,
+        help="Pages reclaimed per incremental vacuum step",
+    )
+    maintain_parser.add_argument(
+        "--json", action="store_true", help="Print the report as JSON"
+    )
+
+    compile_parser = commands.add_parser(
+        "compile", help="Write a read-only snapshot for fast lookups"
+    )
+    compile_parser.add_argument("--output", type=Path, default=None)
+
+    lookup_parser = commands.add_parser(
+        "lookup", help="Look keybinds up in the compiled snapshot"
+    )
+    lookup_parser.add_argument("keys", help="Key chord, or a category name")
+    lookup_parser.add_argument(
+        "--prefix", action="store_true", help="Match keys starting with KEYS"
+    )
+    lookup_parser.add_argument(
+        "--category", action="store_true", help="List the keybinds of a category"
+    )
+    lookup_parser.add_argument("--limit", type=int, default=None)
+    lookup_parser.add_argument("--snapshot", type=Path, default=None)
+
+    render_parser = commands.add_parser(
+        "render", help="Write a printable cheat sheet of the vault"
+    )
+    render_parser.add_argument("--format", choices=tuple(RENDERERS), default="md")
+    render_parser.add_argument(
+        "--output", type=Path, default=None, help="File to write, stdout by default"
+    )
+    render_parser.add_argument(
+        "--search", default=None, help="Only keybinds matching this term"
+    )
+    render_parser.add_argument(
+        "--fields",
+        nargs="+",
+        choices=("keys", "description"),
+        default=["keys", "description"],
+        help="Columns --search looks in",
+    )
+    render_parser.add_argument(
+        "--category", default=None, help="Only this category, any case"
+    )
+    render_parser.add_argument(
+        "--no-cache", action="store_true", help="Render again even if unchanged"
+    )
+
+    stress_parser = commands.add_parser(
+        "stress",
+        help="Run concurrent reads and writes against a scratch vault and report lock contention",
+    )
+    stress_parser.add_argument("--workers", type=int, default=4)
+    stress_parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="Run the workers as processes instead of threads",
+    )
+    stress_parser.add_argument("--seconds", type=float, default=5.0)
+    stress_parser.add_argument(
+        "--write-ratio", type=float, default=0.3, help="Share of operations that write"
+    )
+    stress_parser.add_argument(
+        "--rows", type=int, default=500, help="Keybinds seeded before the run"
+    )
+    stress_parser.add_argument(
+        "--vault",
+        type=Path,
+        default=None,
+        help="Stress a copy of this vault instead of a scratch one",
+    )
+    stress_parser.add_argument(
+        "--busy-timeout", type=float, default=None, help="Seconds, overrides the config"
+    )
+    stress_parser.add_argument("--retries", type=int, default=None)
+    stress_parser.add_argument(
+        "--backoff", type=float, default=None, help="Seconds before the first retry"
+    )
+    stress_parser.add_argument(
+        "--json", action="store_true", help="Print the report as JSON"
+    )
+
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    config = load_config()
+    configure_locking(config.lock_policy)
+
+    # Runs against a scratch vault unless given one
+    if args.command == "stress":
+        run_stress_test(args, config)
+        return
+
+    # Lookups only read the snapshot, SQLite is opened only if it is out of date
+    if args.command == "lookup":
+        run_lookup(args)
+        return
+
+    # Past the lookup, which does not need it
+    import asyncio
+
+    initialize()
+
+    try:
+        if args.command == "search":
+            asyncio.run(search(args))
+        elif args.command == "sync":
+            asyncio.run(sync_vault(args))
+        elif args.command == "maintain":
+            run_maintenance(args)
+        elif args.command == "compile":
+            run_compile(args)
+        elif args.command == "render":
+            run_render(args)
+        else:
+            run_tui(args, config)
+    finally:
+        flush_usage()
+        # Keep a previously compiled snapshot in step with the vault
+        refresh_snapshot()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""User settings, read from config.toml next to the vault.
+
+[tui]
+render_mode = "auto"  # "full", "performance" or "auto"
+
+[database]
+busy_timeout = 5.0  # seconds a write waits on a locked vault, in retries in the TUI
+retries = 5  # further attempts after that, with exponential backoff
+backoff = 0.05  # seconds before the first retry
+"""
+
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from keybind_vault.db.sqlite_db import CONFIG_DIR, LockPolicy
+
+CONFIG_PATH = CONFIG_DIR / "config.toml"
+
+
+@dataclass
+class Config:
+    render_mode: str = "auto"
+    lock_policy: LockPolicy = field(default_factory=LockPolicy)
+
+
+def _setting(table: dict, key: str, convert, default, path: Path):
+    """Reads one value, an invalid one is reported and gives the default."""
+    try:
+        return convert(table.get(key, default))
+    except (TypeError, ValueError):
+        print(f"Config error ({path}): invalid {key} {table[key]!r}")
+        return default
+
+
+def load_config(path: Optional[Path] = None) -> Config:
+    """Reads the config file, a missing or broken file gives the defaults."""
+    path = path or CONFIG_PATH
+    try:
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+    except FileNotFoundError:
+        return Config()
+    except tomllib.TOMLDecodeError as e:
+        print(f"Config error ({path}): {e}")
+        return Config()
+
+    tui = data.get("tui", {})
+    database = data.get("database", {})
+    defaults = LockPolicy()
+    return Config(
+        render_mode=tui.get("render_mode", Config.render_mode),
+        lock_policy=LockPolicy(
+            busy_timeout=_setting(
+                database, "busy_timeout", float, defaults.busy_timeout, path
+            ),
+            retries=_setting(database, "retries", int, defaults.retries, path),
+            backoff=_setting(database, "backoff", float, defaults.backoff, path),
+        ),
+    )
@@ -1,27 +1,118 @@
 from .sqlite_db import (
     Category,
     KeyBind,
+    KeybindOrder,
+    LockPolicy,
+    LockStats,
+    configure_locking,
     get_categories,
+    get_category,
     get_keybinds_by_category,
     insert_category,
     insert_keybind,
     initialize,
+    delete_categories,
     delete_category,
     delete_keybind,
+    delete_keybinds,
+    get_empty_categories,
+    get_lock_stats,
+    get_vault_version,
+    move_keybinds,
+    read_with_retries,
+    reset_lock_stats,
+    search_keybinds,
     update_category,
     update_keybind,
+    update_keybind_descriptions,
 )
+from .maintenance import (
+    IDLE_AFTER,
+    IDLE_CHECK_INTERVAL,
+    VACUUM_STEP_PAGES,
+    DbStats,
+    MaintenanceReport,
+    get_stats,
+    idle_maintenance,
+    maintain,
+)
+from .prefetch import (
+    PREFETCH_DELAY,
+    Prefetch,
+    PrefetchStats,
+    get_prefetch_stats,
+    load_prefetch,
+    prefetch_category,
+    record_visit,
+    store_prefetch,
+)
+from .sync import SyncReport, sync
+from .tags import (
+    Tag,
+    delete_tag,
+    filter_keybind_ids,
+    get_keybinds_by_tags,
+    get_tags,
+    insert_tag,
+    tag_keybinds,
+    untag_keybinds,
+)
+from .usage import FLUSH_INTERVAL, flush_usage, record_usage
 
 __all__ = [
     "Category",
     "KeyBind",
+    "KeybindOrder",
+    "LockPolicy",
+    "LockStats",
+    "DbStats",
+    "MaintenanceReport",
+    "PrefetchStats",
+    "SyncReport",
+    "Tag",
+    "FLUSH_INTERVAL",
+    "IDLE_AFTER",
+    "IDLE_CHECK_INTERVAL",
+    "VACUUM_STEP_PAGES",
+    "PREFETCH_DELAY",
+    "configure_locking",
     "get_categories",
+    "get_category",
     "get_keybinds_by_category",
     "insert_category",
     "insert_keybind",
     "initialize",
+    "delete_categories",
     "delete_category",
     "delete_keybind",
+    "delete_keybinds",
+    "get_empty_categories",
+    "get_lock_stats",
+    "get_vault_version",
+    "move_keybinds",
+    "read_with_retries",
+    "reset_lock_stats",
+    "search_keybinds",
     "update_category",
     "update_keybind",
+    "update_keybind_descriptions",
+    "flush_usage",
+    "record_usage",
+    "sync",
+    "get_prefetch_stats",
+    "prefetch_category",
+    "Prefetch",
+    "load_prefetch",
+    "store_prefetch",
+    "record_visit",
+    "delete_tag",
+    "filter_keybind_ids",
+    "get_keybinds_by_tags",
+    "get_tags",
+    "insert_tag",
+    "tag_keybinds",
+    "untag_keybinds",
+    "get_stats",
+    "idle_maintenance",
+    "maintain",
 ]
@@ -0,0 +1,145 @@
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .sqlite_db import _call_locked, _connect
+
+# Pages reclaimed per incremental vacuum step, small enough to never stall the UI
+VACUUM_STEP_PAGES = 64
+# Seconds without input before the TUI starts maintenance in the background
+IDLE_AFTER = 120.0
+IDLE_CHECK_INTERVAL = 30.0
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+@dataclass
+class DbStats:
+    page_size: int
+    page_count: int
+    freelist_count: int
+    auto_vacuum: str
+    row_counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def file_size(self) -> int:
+        return self.page_size * self.page_count
+
+
+@dataclass
+class MaintenanceReport:
+    before: DbStats
+    after: DbStats
+    pages_reclaimed: int = 0
+    switched_to_incremental: bool = False
+    integrity: list[str] = field(default_factory=list)
+    # Set when the vault stayed locked and the remaining steps were skipped
+    error: Optional[str] = None
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> int:
+    return int(conn.execute(f"PRAGMA {name}").fetchone()[0])
+
+
+def get_stats(path: Optional[Path] = None) -> DbStats:
+    with closing(_connect(path)) as conn:
+        tables = [
+            row["name"]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+        ]
+        return DbStats(
+            page_size=_pragma(conn, "page_size"),
+            page_count=_pragma(conn, "page_count"),
+            freelist_count=_pragma(conn, "freelist_count"),
+            auto_vacuum=AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "unknown"),
+            row_counts={
+                table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in tables
+            },
+        )
+
+
+def enable_incremental_vacuum(path: Optional[Path] = None) -> bool:
+    """Switches the vault to incremental auto vacuum, returns whether it had to.
+
+    Changing the mode of a vault that already has tables needs one full VACUUM,
+    which rewrites the file, so this is only done from the `maintain` command.
+    """
+    with closing(_connect(path)) as conn:
+        if _pragma(conn, "auto_vacuum") == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+
+
+def incremental_vacuum(
+    pages: int = VACUUM_STEP_PAGES, path: Optional[Path] = None
+) -> int:
+    """Returns up to `pages` free pages to the file system, returns how many were freed."""
+    with closing(_connect(path)) as conn:
+        if _pragma(conn, "auto_vacuum") != 2:
+            return 0
+        before = _pragma(conn, "freelist_count")
+        if before == 0:
+            return 0
+        # The pragma frees one page per result row, it only runs as far as it is read
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return before - _pragma(conn, "freelist_count")
+
+
+def optimize(analyze: bool = False, path: Optional[Path] = None) -> None:
+    """Refreshes the query planner statistics, a full ANALYZE when asked for."""
+    with closing(_connect(path)) as conn:
+        if analyze:
+            conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+
+
+def integrity_check(path: Optional[Path] = None) -> list[str]:
+    """Returns ["ok"] for a healthy vault, otherwise the problems found."""
+    with closing(_connect(path)) as conn:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check")]
+
+
+def maintain(
+    vacuum: bool = True,
+    step_pages: int = VACUUM_STEP_PAGES,
+    path: Optional[Path] = None,
+) -> MaintenanceReport:
+    """Runs every step with the configured lock retries, stops at the first that fails."""
+    before = _call_locked(get_stats, path)
+    report = MaintenanceReport(before=before, after=before)
+
+    try:
+        if vacuum:
+            report.switched_to_incremental = _call_locked(
+                enable_incremental_vacuum, path
+            )
+            # Reclaim in small steps so other connections can write in between
+            while freed := _call_locked(incremental_vacuum, step_pages, path):
+                report.pages_reclaimed += freed
+
+        _call_locked(optimize, analyze=True, path=path)
+        report.integrity = _call_locked(integrity_check, path)
+    except sqlite3.OperationalError as e:
+        report.error = str(e)
+
+    report.after = _call_locked(get_stats, path)
+    return report
+
+
+def idle_maintenance(path: Optional[Path] = None) -> int:
+    """One small background step: reclaim a few pages and let SQLite re-plan if needed."""
+    try:
+        freed = incremental_vacuum(VACUUM_STEP_PAGES, path)
+        optimize(path=path)
+    except sqlite3.OperationalError:
+        # Someone else is writing, the next idle check tries again
+        return 0
+    return freed
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from . import sqlite_db
+from .sqlite_db import CategoryId, KeyBind, _keybinds_cache, _load_keybinds
+
+# Keybinds that prefetched, not yet visited categories may hold in the cache
+PREFETCH_BUDGET = 2_000
+# Seconds the highlight has to rest on a category before its neighbours load,
+# so holding an arrow key down does not queue a load per category passed
+PREFETCH_DELAY = 0.15
+
+
+@dataclass
+class PrefetchStats:
+    loaded: int = 0
+    # First visits served by a prefetch, and first visits that hit the database
+    hits: int = 0
+    misses: int = 0
+    # Prefetched and dropped again before anyone looked at them
+    evicted: int = 0
+    over_budget: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        visits = self.hits + self.misses
+        return self.hits / visits if visits else 0.0
+
+    @property
+    def accuracy(self) -> float:
+        return self.hits / self.loaded if self.loaded else 0.0
+
+
+@dataclass
+class Prefetch:
+    category_id: CategoryId
+    # sqlite_db._cache_generation when the rows were read
+    generation: int
+    keybinds: list[KeyBind]
+
+
+# Prefetched categories that were not visited yet with their sizes, oldest first
+_prefetched: OrderedDict[CategoryId, int] = OrderedDict()
+_prefetch_lock = threading.Lock()
+_stats = PrefetchStats()
+
+
+def get_prefetch_stats() -> PrefetchStats:
+    return PrefetchStats(**vars(_stats))
+
+
+def _known_size(category_id: int) -> int:
+    # The maintained count when categories are cached, else assume it fits
+    categories = sqlite_db._categories_cache
+    if categories is not None and category_id in categories:
+        return categories[category_id].keybind_count
+    return 0
+
+
+def _make_room(size: int) -> bool:
+    if size > PREFETCH_BUDGET:
+        return False
+    held = sum(_prefetched.values())
+    while _prefetched and held + size > PREFETCH_BUDGET:
+        category_id, dropped = _prefetched.popitem(last=False)
+        _keybinds_cache.pop(category_id, None)
+        held -= dropped
+        _stats.evicted += 1
+    return held + size <= PREFETCH_BUDGET
+
+
+def load_prefetch(category_id: int) -> Optional[Prefetch]:
+    """Reads a category ahead of a visit, meant for a background thread.
+
+    Only reads, store_prefetch puts the rows in the cache on the thread that
+    owns it. Categories that are already cached or would not fit in
+    PREFETCH_BUDGET give None.
+    """
+    if category_id in _keybinds_cache:
+        return None
+    if _known_size(category_id) > PREFETCH_BUDGET:
+        with _prefetch_lock:
+            _stats.over_budget += 1
+        return None
+
+    generation = sqlite_db._cache_generation
+    try:
+        keybinds = _load_keybinds(category_id)
+    except sqlite3.OperationalError:
+        # Only a guess, the visit itself loads it if the vault is free by then
+        return None
+    return Prefetch(category_id, generation, keybinds)
+
+
+def store_prefetch(prefetch: Prefetch) -> bool:
+    """Caches a loaded prefetch, returns whether it did. Call it from the thread the writes run on."""
+    if prefetch.generation != sqlite_db._cache_generation:
+        # A write landed while it was loading, the rows may predate it
+        return False
+    if prefetch.category_id in _keybinds_cache:
+        # Loaded for a visit while this was reading
+        return False
+
+    with _prefetch_lock:
+        # The count can be stale for a category that was never cached
+        if not _make_room(len(prefetch.keybinds)):
+            _stats.over_budget += 1
+            return False
+        _keybinds_cache[prefetch.category_id] = {
+            keybind.id: keybind for keybind in prefetch.keybinds
+        }
+        _prefetched[prefetch.category_id] = len(prefetch.keybinds)
+        _stats.loaded += 1
+    return True
+
+
+def prefetch_category(category_id: int) -> bool:
+    """Loads and caches a category in one go, for callers on the writing thread."""
+    prefetch = load_prefetch(category_id)
+    return prefetch is not None and store_prefetch(prefetch)
+
+
+def record_visit(category_id: int) -> None:
+    """Counts a visit as a prefetch hit or miss, call it before reading the category."""
+    with _prefetch_lock:
+        prefetched = _prefetched.pop(category_id, None) is not None
+        if category_id not in _keybinds_cache:
+            _stats.misses += 1
+        elif prefetched:
+            _stats.hits += 1
@@ -1,6 +1,12 @@
+import functools
+import random
 import sqlite3
+import threading
+import time
+from collections.abc import Iterator
 from contextlib import closing
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from enum import Enum
 from pathlib import Path
 from typing import Optional
 
@@ -16,81 +22,615 @@ class KeyBind:
     keys: str
     description: str
     category_id: Optional[int]
+    frecency: Optional[float] = None
 
 
 @dataclass
 class Category:
     id: int
     name: str
+    keybind_count: int = 0
+
+
+@dataclass
+class LockPolicy:
+    """How long writes wait for another connection to release the vault."""
+
+    # Seconds SQLite itself waits on a locked database before giving up
+    busy_timeout: float = 5.0
+    # Further attempts once it gave up, each after twice the previous delay
+    retries: int = 5
+    backoff: float = 0.05
+
+    def for_event_loop(self) -> "LockPolicy":
+        """The same patience, spent in backoff sleeps the event loop runs during.
+
+        SQLite waiting on a lock blocks the thread, so each attempt is capped at
+        EVENT_LOOP_BUSY_TIMEOUT and retries are added until the backoff covers
+        the busy timeout given up.
+        """
+        if self.backoff <= 0:
+            return replace(self, busy_timeout=EVENT_LOOP_BUSY_TIMEOUT)
+        retries, waited, delay = 0, 0.0, self.backoff
+        while retries < self.retries or waited < self.busy_timeout:
+            waited += delay
+            delay *= 2
+            retries += 1
+        return replace(
+            self,
+            busy_timeout=min(self.busy_timeout, EVENT_LOOP_BUSY_TIMEOUT),
+            retries=retries,
+        )
+
+
+@dataclass
+class LockStats:
+    retries: int = 0
+    # Writes that were still locked out after every retry
+    failures: int = 0
+
+
+class KeybindOrder(Enum):
+    INSERTION = "insertion"
+    FRECENCY = "frecency"
 
 
 CategoryId = int
 KeybindId = int
+KEYBIND_COLUMNS = "id, keys, description, category_id, frecency"
+CATEGORY_COLUMNS = "id, name, keybind_count"
+# Unix time in SQL, julianday keeps sub-second precision on older SQLite builds
+SQL_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+# Sync uid of the default category, the same in every vault
+GENERAL_UID = "name:General"
+# Bumped whenever _upgrade_schema changes, vaults stamped with it skip it
+SCHEMA_VERSION = 1
+# Longest a single attempt may block when the caller runs on an event loop
+EVENT_LOOP_BUSY_TIMEOUT = 0.05
 # In-memory cache
 _keybinds_cache: dict[CategoryId, dict[KeybindId, KeyBind]] = {}
+# Every category with its keybind count, loaded on first use and then kept up
+# to date by the functions below, mirroring what the count triggers do in SQL
+_categories_cache: Optional[dict[CategoryId, Category]] = None
+# Bumped by every write, a prefetch that read the vault before the latest
+# write may hold rows the write changed and is dropped
+_cache_generation = 0
+
+_lock_policy = LockPolicy()
+_lock_stats = LockStats()
+_lock_stats_lock = threading.Lock()
 
-
-def _connect():
-    conn = sqlite3.connect(DB_PATH)
+
+def configure_locking(policy: LockPolicy) -> None:
+    global _lock_policy
+    _lock_policy = policy
+
+
+def get_lock_stats() -> LockStats:
+    with _lock_stats_lock:
+        return LockStats(_lock_stats.retries, _lock_stats.failures)
+
+
+def reset_lock_stats() -> None:
+    with _lock_stats_lock:
+        _lock_stats.retries = _lock_stats.failures = 0
+
+
+def _count_lock(retried: bool) -> None:
+    with _lock_stats_lock:
+        if retried:
+            _lock_stats.retries += 1
+        else:
+            _lock_stats.failures += 1
+
+
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+def _retry_delays() -> Iterator[float]:
+    """Exponential backoff with jitter, so waiting writers do not retry in step."""
+    delay = _lock_policy.backoff
+    for _ in range(_lock_policy.retries):
+        yield delay * random.uniform(0.5, 1.5)
+        delay *= 2
+
+
+async def _sleep(delay: float) -> None:
+    # asyncio is imported on the first retry, `lookup` loads this module on
+    # every call and importing it costs more than the lookup itself
+    import asyncio
+
+    await asyncio.sleep(delay)
+
+
+def _retry_locked(failure):
+    """Retries a write that found the vault locked, `failure` is returned if it never gets in.
+
+    Every other database error is reported and turned into `failure` too, instead
+    of taking the caller down. Constraint errors stay with the function itself.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            delays = _retry_delays()
+            while True:
+                try:
+                    result = await func(*args, **kwargs)
+                    _bump_cache_generation()
+                    return result
+                except sqlite3.OperationalError as e:
+                    delay = next(delays, None) if _is_locked(e) else None
+                    if delay is None:
+                        if _is_locked(e):
+                            _count_lock(retried=False)
+                        print(f"Database error ({func.__name__}): {e}")
+                        return failure
+                    _count_lock(retried=True)
+                    await _sleep(delay)
+                except sqlite3.DatabaseError as e:
+                    print(f"Database error ({func.__name__}): {e}")
+                    return failure
+
+        return wrapper
+
+    return decorator
+
+
+async def read_with_retries(read, *args, **kwargs):
+    """Runs a read, retrying it like the writes while the vault is locked.
+
+    The last OperationalError is raised if the vault stays locked.
+    """
+    delays = _retry_delays()
+    while True:
+        try:
+            result = read(*args, **kwargs)
+            return await result if hasattr(result, "__await__") else result
+        except sqlite3.OperationalError as e:
+            delay = next(delays, None) if _is_locked(e) else None
+            if delay is None:
+                if _is_locked(e):
+                    _count_lock(retried=False)
+                raise
+            _count_lock(retried=True)
+            await _sleep(delay)
+
+
+def _call_locked(func, *args, **kwargs):
+    """Blocking counterpart of _retry_locked, for code that runs outside the event loop.
+
+    Raises the last OperationalError if the vault stays locked.
+    """
+    delays = _retry_delays()
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            delay = next(delays, None) if _is_locked(e) else None
+            if delay is None:
+                if _is_locked(e):
+                    _count_lock(retried=False)
+                raise
+            _count_lock(retried=True)
+            time.sleep(delay)
+
+
+def _connect(path: Optional[Path] = None):
+    conn = sqlite3.connect(path or DB_PATH, timeout=_lock_policy.busy_timeout)
     conn.row_factory = sqlite3.Row  # Optional, for named columns
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
 
-def initialize() -> None:
-    with closing(_connect()) as conn:
+def initialize(path: Optional[Path] = None) -> None:
+    _call_locked(_create_schema, path)
+
+
+def _create_schema(path: Optional[Path] = None) -> None:
+    with closing(_connect(path)) as conn:
         cursor = conn.cursor()
+        # An up to date vault is only read, so commands that just read take no
+        # write lock and leave the file untouched
+        if cursor.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            _upgrade_schema(cursor)
+        # Recreated if it was deleted, a read first keeps this free when it exists
+        if not cursor.execute(
+            "SELECT 1 FROM category WHERE name = ?", ("General",)
+        ).fetchone():
+            # Every vault creates "General" under the same uid, so syncing merges them
+            cursor.execute(
+                "INSERT OR IGNORE INTO category (name, uid) VALUES (?, ?)",
+                ("General", GENERAL_UID),
+            )
+        conn.commit()
 
+
+def _upgrade_schema(cursor: sqlite3.Cursor) -> None:
+    """Creates whatever the vault is missing and backfills it, then stamps SCHEMA_VERSION."""
+    # Only takes effect on a new file, existing vaults switch with `maintain`
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS category (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS keybinds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keys TEXT NOT NULL,
+            description TEXT,
+            category_id INTEGER,
+            FOREIGN KEY (category_id) REFERENCES category (id) ON DELETE CASCADE
+        );
+    """)
+    added = _add_missing_columns(
+        cursor, "category", {"keybind_count": "INTEGER NOT NULL DEFAULT 0"}
+    )
+    if added:
+        # One-off backfill, from here on the triggers keep the counts
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS category (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            );
+            UPDATE category
+            SET keybind_count = (
+                SELECT COUNT(*) FROM keybinds WHERE keybinds.category_id = category.id
+            )
         """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS keybinds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                keys TEXT NOT NULL,
-                description TEXT,
-                category_id INTEGER,
-                FOREIGN KEY (category_id) REFERENCES category (id) ON DELETE CASCADE
-            );
+    _add_missing_columns(
+        cursor,
+        "keybinds",
+        {
+            "use_count": "INTEGER NOT NULL DEFAULT 0",
+            "last_used": "REAL",
+            "frecency": "REAL",
+        },
+    )
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_keybinds_category_frecency
+        ON keybinds (category_id, frecency DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_keybinds_frecency
+        ON keybinds (frecency DESC)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tag (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS keybind_tag (
+            keybind_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (keybind_id, tag_id),
+            FOREIGN KEY (keybind_id) REFERENCES keybinds (id) ON DELETE CASCADE,
+            FOREIGN KEY (tag_id) REFERENCES tag (id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_keybind_tag_tag
+        ON keybind_tag (tag_id, keybind_id)
+    """)
+    _create_count_triggers(cursor)
+    _create_sync_schema(cursor)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _create_count_triggers(cursor: sqlite3.Cursor) -> None:
+    """Keeps category.keybind_count in step with the keybinds table."""
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS keybinds_count_insert
+        AFTER INSERT ON keybinds
+        BEGIN
+            UPDATE category SET keybind_count = keybind_count + 1
+            WHERE id = NEW.category_id;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS keybinds_count_delete
+        AFTER DELETE ON keybinds
+        BEGIN
+            UPDATE category SET keybind_count = keybind_count - 1
+            WHERE id = OLD.category_id;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS keybinds_count_move
+        AFTER UPDATE OF category_id ON keybinds
+        WHEN OLD.category_id IS NOT NEW.category_id
+        BEGIN
+            UPDATE category SET keybind_count = keybind_count - 1
+            WHERE id = OLD.category_id;
+            UPDATE category SET keybind_count = keybind_count + 1
+            WHERE id = NEW.category_id;
+        END;
+    """)
+
+
+def _create_sync_schema(cursor: sqlite3.Cursor) -> None:
+    """Row versions, timestamps and tombstones used to exchange deltas between vaults.
+
+    Every insert, content update and delete bumps the vault clock and stamps the
+    row (or its tombstone) with it, so changes since a given version can be read
+    straight from the row_version indexes.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vault_meta (
+            key TEXT PRIMARY KEY,
+            value NOT NULL
+        );
+    """)
+    cursor.execute(
+        "INSERT OR IGNORE INTO vault_meta (key, value) VALUES ('vault_id', lower(hex(randomblob(16))))"
+    )
+    cursor.execute("INSERT OR IGNORE INTO vault_meta (key, value) VALUES ('clock', 0)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tombstones (
+            uid TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            deleted_at REAL NOT NULL,
+            row_version INTEGER NOT NULL,
+            origin TEXT
+        );
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            peer_id TEXT PRIMARY KEY,
+            received_version INTEGER NOT NULL DEFAULT 0,
+            acked_version INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+
+    # origin is the vault a row's current state was received from, NULL when
+    # it was last written here
+    sync_columns = {
+        "uid": "TEXT",
+        "updated_at": "REAL",
+        "row_version": "INTEGER",
+        "origin": "TEXT",
+    }
+    _add_missing_columns(cursor, "category", sync_columns)
+    _add_missing_columns(cursor, "keybinds", sync_columns)
+    _add_missing_columns(cursor, "tombstones", {"origin": "TEXT"})
+    _add_missing_columns(
+        cursor, "sync_state", {"acked_version": "INTEGER NOT NULL DEFAULT 0"}
+    )
+
+    # Rows created before versioning existed are all part of the first delta
+    cursor.execute("UPDATE vault_meta SET value = max(value, 1) WHERE key = 'clock'")
+    # Categories that predate versioning are identified by their name, so vaults
+    # upgraded separately merge them instead of duplicating them
+    cursor.execute(f"""
+        UPDATE category
+        SET uid = coalesce(uid, 'name:' || name),
+            updated_at = coalesce(updated_at, {SQL_NOW}),
+            row_version = coalesce(row_version, 1)
+        WHERE uid IS NULL OR row_version IS NULL
+    """)
+    cursor.execute(f"""
+        UPDATE keybinds
+        SET uid = coalesce(uid, lower(hex(randomblob(16)))),
+            updated_at = coalesce(updated_at, {SQL_NOW}),
+            row_version = coalesce(row_version, 1)
+        WHERE uid IS NULL OR row_version IS NULL
+    """)
+
+    for table in ("category", "keybinds", "tombstones"):
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_row_version
+            ON {table} (row_version)
+        """)
+    for table in ("category", "keybinds"):
+        cursor.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table} (uid)
+        """)
+
+    tick = "UPDATE vault_meta SET value = value + 1 WHERE key = 'clock';"
+    clock = "(SELECT value FROM vault_meta WHERE key = 'clock')"
+    content_columns = {"category": "name", "keybinds": "keys, description, category_id"}
+    kinds = {"category": "category", "keybinds": "keybind"}
+
+    for table in ("category", "keybinds"):
+        # Recreated on every upgrade, so older vaults get the current definitions
+        for action in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_sync_{action}")
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_sync_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {tick}
+                UPDATE {table}
+                SET uid = coalesce(NEW.uid, lower(hex(randomblob(16)))),
+                    updated_at = coalesce(NEW.updated_at, {SQL_NOW}),
+                    row_version = {clock}
+                WHERE id = NEW.id;
+                -- A row created again under a deleted uid is alive again
+                DELETE FROM tombstones
+                WHERE uid = (SELECT uid FROM {table} WHERE id = NEW.id);
+            END;
+        """)
+        # A statement that sets updated_at itself (sync applying a remote row)
+        # keeps it and its origin, local edits are stamped with the current time
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_sync_update
+            AFTER UPDATE OF {content_columns[table]} ON {table}
+            BEGIN
+                {tick}
+                UPDATE {table}
+                SET updated_at = CASE
+                        WHEN NEW.updated_at IS NOT OLD.updated_at THEN NEW.updated_at
+                        ELSE {SQL_NOW}
+                    END,
+                    origin = CASE
+                        WHEN NEW.updated_at IS NOT OLD.updated_at THEN NEW.origin
+                    END,
+                    row_version = {clock}
+                WHERE id = NEW.id;
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_sync_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {tick}
+                INSERT OR REPLACE INTO tombstones (uid, kind, deleted_at, row_version)
+                VALUES (OLD.uid, '{kinds[table]}', {SQL_NOW}, {clock});
+            END;
         """)
-        cursor.execute("INSERT OR IGNORE INTO category (name) VALUES (?)", ("General",))
-        conn.commit()
+
+
+def get_vault_version(path: Optional[Path] = None) -> int:
+    """Returns the vault clock, it changes whenever a category or keybind does."""
+    with closing(_connect(path)) as conn:
+        row = conn.execute(
+            "SELECT value FROM vault_meta WHERE key = 'clock'"
+        ).fetchone()
+        return int(row["value"]) if row else 0
+
+
+def _add_missing_columns(
+    cursor: sqlite3.Cursor, table: str, columns: dict[str, str]
+) -> list[str]:
+    """Adds the given columns to a table created by an older version."""
+    existing = {row["name"] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    added = []
+    for name, declaration in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+            added.append(name)
+    return added
+
+
+def _adjust_keybind_count(category_id: Optional[int], delta: int) -> None:
+    if _categories_cache is not None and category_id in _categories_cache:
+        _categories_cache[category_id].keybind_count += delta
+
+
+def _bump_cache_generation() -> None:
+    global _cache_generation
+    _cache_generation += 1
+
+
+def reset_caches() -> None:
+    """Forgets everything cached, for when the vault was changed from elsewhere."""
+    global _categories_cache
+    _categories_cache = None
+    _keybinds_cache.clear()
+    _bump_cache_generation()
+
+
+def _sort_by_frecency(keybinds: list[KeyBind]) -> list[KeyBind]:
+    # Never used keybinds have no score and keep their insertion order at the end
+    return sorted(
+        keybinds,
+        key=lambda kb: (kb.frecency is None, -(kb.frecency or 0.0)),
+    )
+
+
+def _search_clause(term: str, fields: tuple[str, ...]) -> tuple[str, list[str]]:
+    """Builds a case-insensitive substring filter over the given keybind columns."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    clause = " OR ".join(f"{field} LIKE ? ESCAPE '\\'" for field in fields)
+    return f"({clause})", [pattern] * len(fields)
 
 
 async def get_categories() -> list[Category]:
+    global _categories_cache
+    if _categories_cache is not None:
+        return list(_categories_cache.values())
+
     with closing(_connect()) as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM category")
+        cursor.execute(f"SELECT {CATEGORY_COLUMNS} FROM category ORDER BY id")
         rows = cursor.fetchall()
 
-        return [Category(**dict(row)) for row in rows]
+        _categories_cache = {int(row["id"]): Category(**dict(row)) for row in rows}
+        return list(_categories_cache.values())
+
+
+async def get_category(category_id: int) -> Optional[Category]:
+    if _categories_cache is None:
+        await get_categories()
+    return _categories_cache.get(category_id)
+
+
+async def get_empty_categories() -> list[Category]:
+    return [
+        category for category in await get_categories() if not category.keybind_count
+    ]
 
 
-async def get_keybinds_by_category(category_id: int = 1) -> list[KeyBind]:
+async def get_keybinds_by_category(
+    category_id: int = 1, order: KeybindOrder = KeybindOrder.INSERTION
+) -> list[KeyBind]:
     if category_id in _keybinds_cache:
-        return list(_keybinds_cache[category_id].values())
+        keybinds = list(_keybinds_cache[category_id].values())
+        if order == KeybindOrder.FRECENCY:
+            return _sort_by_frecency(keybinds)
+        return keybinds
+
+    keybinds = _load_keybinds(category_id, order)
+    # The cache always keeps insertion order, frecency is sorted on read
+    _keybinds_cache[category_id] = {
+        keybind.id: keybind for keybind in sorted(keybinds, key=lambda kb: kb.id)
+    }
+    return keybinds
+
+
+def _load_keybinds(
+    category_id: int, order: KeybindOrder = KeybindOrder.INSERTION
+) -> list[KeyBind]:
+    order_by = (
+        "frecency DESC NULLS LAST, id" if order == KeybindOrder.FRECENCY else "id"
+    )
 
     with closing(_connect()) as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """
-            SELECT * 
+            f"""
+            SELECT {KEYBIND_COLUMNS}
             FROM keybinds
             WHERE category_id = ?
+            ORDER BY {order_by}
         """,
             (category_id,),
         )
         rows = cursor.fetchall()
 
-        results = {int(row["id"]): KeyBind(**dict(row)) for row in rows}
+        return [KeyBind(**dict(row)) for row in rows]
+
+
+async def search_keybinds(
+    term: str,
+    fields: tuple[str, ...] = ("keys", "description"),
+    category_id: Optional[int] = None,
+    order: KeybindOrder = KeybindOrder.INSERTION,
+    limit: Optional[int] = None,
+) -> list[KeyBind]:
+    clause, params = _search_clause(term, fields)
+    if category_id is not None:
+        clause += " AND category_id = ?"
+        params.append(category_id)
+
+    order_by = (
+        "frecency DESC NULLS LAST, id" if order == KeybindOrder.FRECENCY else "id"
+    )
+    sql = f"SELECT {KEYBIND_COLUMNS} FROM keybinds WHERE {clause} ORDER BY {order_by}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
 
-        _keybinds_cache[category_id] = results
-        return list(results.values())
+    with closing(_connect()) as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return [KeyBind(**dict(row)) for row in cursor.fetchall()]
 
 
+@_retry_locked(failure=None)
 async def update_keybind(
     keybind_id: int,
     keys: Optional[str],
@@ -118,6 +658,10 @@ async def update_keybind(
                 # Nothing to update
                 return None
 
+            previous = cursor.execute(
+                "SELECT category_id FROM keybinds WHERE id = ?", (keybind_id,)
+            ).fetchone()
+
             values.append(keybind_id)
             sql = f"""
                 UPDATE keybinds
@@ -127,21 +671,28 @@ async def update_keybind(
             cursor.execute(sql, tuple(values))
             conn.commit()
 
-            cursor.execute("SELECT * FROM keybinds WHERE id = ?", (keybind_id,))
+            cursor.execute(
+                f"SELECT {KEYBIND_COLUMNS} FROM keybinds WHERE id = ?", (keybind_id,)
+            )
             row = cursor.fetchone()
             if row:
                 result = KeyBind(**dict(row))
-                # Use original category_id if not updated
-                cache_category_id = (
-                    category_id if category_id is not None else result.category_id
-                )
-                _keybinds_cache[cache_category_id][keybind_id] = result
+                old_category_id = previous["category_id"] if previous else None
+                if old_category_id != result.category_id:
+                    _keybinds_cache.get(old_category_id, {}).pop(keybind_id, None)
+                    _adjust_keybind_count(old_category_id, -1)
+                    _adjust_keybind_count(result.category_id, 1)
+                # Categories that were never loaded are read in full on first access
+                cached = _keybinds_cache.get(result.category_id)
+                if cached is not None:
+                    cached[keybind_id] = result
                 return result
     except sqlite3.IntegrityError as e:
         print(f"Update error (keybind): {e}")
     return None
 
 
+@_retry_locked(failure=None)
 async def insert_keybind(
     keys: str, description: str, category_id: int
 ) -> Optional[KeyBind]:
@@ -152,7 +703,7 @@ async def insert_keybind(
                 """
                 INSERT INTO keybinds (keys, description, category_id)
                 VALUES (?, ?, ?)
-                RETURNING id, keys, description, category_id
+                RETURNING id, keys, description, category_id, frecency
             """,
                 (keys, description, category_id),
             )
@@ -160,48 +711,144 @@ async def insert_keybind(
             conn.commit()
             if row:
                 result = KeyBind(**dict(row))
-                _keybinds_cache[category_id][int(row["id"])] = result
+                cached = _keybinds_cache.get(category_id)
+                if cached is not None:
+                    cached[result.id] = result
+                _adjust_keybind_count(category_id, 1)
                 return result
     except sqlite3.IntegrityError as e:
         print(f"Insert error (keybind): {e}")
     return None
 
 
+@_retry_locked(failure=False)
 async def delete_keybind(keybind_id: int, category_id: int) -> bool:
     try:
         with closing(_connect()) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM keybinds WHERE id = ?", (keybind_id,))
+            deleted = cursor.rowcount
             conn.commit()
 
-        _keybinds_cache[category_id].pop(keybind_id, None)
+        _keybinds_cache.get(category_id, {}).pop(keybind_id, None)
+        _adjust_keybind_count(category_id, -deleted)
         return True
     except sqlite3.IntegrityError as e:
         print(f"Delete error (keybind): {e}")
     return False
 
 
+@_retry_locked(failure=False)
+async def delete_keybinds(keybind_ids: list[int], category_id: int) -> bool:
+    if not keybind_ids:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            cursor = conn.executemany(
+                "DELETE FROM keybinds WHERE id = ?", [(kid,) for kid in keybind_ids]
+            )
+            deleted = cursor.rowcount
+            conn.commit()
+
+        cached = _keybinds_cache.get(category_id)
+        if cached is not None:
+            for keybind_id in keybind_ids:
+                cached.pop(keybind_id, None)
+        _adjust_keybind_count(category_id, -deleted)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Delete error (keybinds): {e}")
+    return False
+
+
+@_retry_locked(failure=False)
+async def move_keybinds(
+    keybind_ids: list[int], from_category_id: int, to_category_id: int
+) -> bool:
+    if not keybind_ids or from_category_id == to_category_id:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            cursor = conn.executemany(
+                "UPDATE keybinds SET category_id = ? WHERE id = ?",
+                [(to_category_id, kid) for kid in keybind_ids],
+            )
+            moved = cursor.rowcount
+            conn.commit()
+
+        _adjust_keybind_count(from_category_id, -moved)
+        _adjust_keybind_count(to_category_id, moved)
+
+        source = _keybinds_cache.get(from_category_id, {})
+        target = _keybinds_cache.get(to_category_id)
+        for keybind_id in keybind_ids:
+            keybind = source.pop(keybind_id, None)
+            if keybind is None:
+                continue
+            keybind.category_id = to_category_id
+            # Only keep the target up to date if it was already loaded,
+            # otherwise it will be read in full on first access
+            if target is not None:
+                target[keybind_id] = keybind
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Move error (keybinds): {e}")
+    return False
+
+
+@_retry_locked(failure=False)
+async def update_keybind_descriptions(
+    keybind_ids: list[int], description: str, category_id: int
+) -> bool:
+    if not keybind_ids:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            conn.executemany(
+                "UPDATE keybinds SET description = ? WHERE id = ?",
+                [(description, kid) for kid in keybind_ids],
+            )
+            conn.commit()
+
+        cached = _keybinds_cache.get(category_id, {})
+        for keybind_id in keybind_ids:
+            if keybind_id in cached:
+                cached[keybind_id].description = description
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Update error (keybinds): {e}")
+    return False
+
+
+@_retry_locked(failure=None)
 async def insert_category(name: str) -> Optional[Category]:
     try:
         with closing(_connect()) as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """
+                f"""
                 INSERT INTO category (name)
                 VALUES (?)
-                RETURNING *
+                RETURNING {CATEGORY_COLUMNS}
             """,
                 (name,),
             )
             row = cursor.fetchone()
             conn.commit()
             if row:
-                return Category(**dict(row))
+                category = Category(**dict(row))
+                if _categories_cache is not None:
+                    _categories_cache[category.id] = category
+                return category
     except sqlite3.IntegrityError as e:
         print(f"Insert error (category): {e}")
     return None
 
 
+@_retry_locked(failure=None)
 async def update_category(name: str, cat_id: int) -> Optional[Category]:
     try:
         with closing(_connect()) as conn:
@@ -209,22 +856,55 @@ async def update_category(name: str, cat_id: int) -> Optional[Category]:
             cursor.execute("UPDATE category SET name = ? WHERE id = ?", (name, cat_id))
             conn.commit()
 
-            cursor.execute("SELECT id, name FROM category WHERE id = ?", (cat_id,))
+            cursor.execute(
+                f"SELECT {CATEGORY_COLUMNS} FROM category WHERE id = ?", (cat_id,)
+            )
             row = cursor.fetchone()
             if row:
-                return Category(**dict(row))
+                category = Category(**dict(row))
+                if _categories_cache is not None:
+                    _categories_cache[category.id] = category
+                return category
     except sqlite3.IntegrityError as e:
         print(f"Update error (category): {e}")
     return None
 
 
+@_retry_locked(failure=False)
 async def delete_category(category_id: int) -> bool:
     try:
         with closing(_connect()) as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM category WHERE id = ?", (category_id,))
             conn.commit()
-            return True
+
+        # Its keybinds went with it through the cascade
+        _keybinds_cache.pop(category_id, None)
+        if _categories_cache is not None:
+            _categories_cache.pop(category_id, None)
+        return True
     except sqlite3.IntegrityError as e:
         print(f"Delete error (category): {e}")
     return False
+
+
+@_retry_locked(failure=False)
+async def delete_categories(category_ids: list[int]) -> bool:
+    if not category_ids:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            conn.executemany(
+                "DELETE FROM category WHERE id = ?", [(cid,) for cid in category_ids]
+            )
+            conn.commit()
+
+        for category_id in category_ids:
+            _keybinds_cache.pop(category_id, None)
+            if _categories_cache is not None:
+                _categories_cache.pop(category_id, None)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Delete error (categories): {e}")
+    return False
@@ -0,0 +1,439 @@
+import hashlib
+import json
+import sqlite3
+from collections.abc import Collection
+from contextlib import closing
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from .sqlite_db import _connect, initialize, reset_caches
+
+CHANGESET_SUFFIX = ".changeset.json"
+
+
+@dataclass
+class Changeset:
+    vault_id: str
+    from_version: int
+    to_version: int
+    categories: list[dict] = field(default_factory=list)
+    keybinds: list[dict] = field(default_factory=list)
+    tombstones: list[dict] = field(default_factory=list)
+    # What the writer has received from each vault, read back by those vaults
+    acks: dict[str, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.categories) + len(self.keybinds) + len(self.tombstones)
+
+
+@dataclass
+class SyncReport:
+    sent: int = 0
+    received: int = 0
+    applied: int = 0
+    conflicts: int = 0
+    pruned: int = 0
+
+
+def _vault_id(conn: sqlite3.Connection) -> str:
+    return conn.execute(
+        "SELECT value FROM vault_meta WHERE key = 'vault_id'"
+    ).fetchone()[0]
+
+
+def _clock(conn: sqlite3.Connection) -> int:
+    return int(
+        conn.execute("SELECT value FROM vault_meta WHERE key = 'clock'").fetchone()[0]
+    )
+
+
+def _received_version(conn: sqlite3.Connection, peer_id: str) -> int:
+    row = conn.execute(
+        "SELECT received_version FROM sync_state WHERE peer_id = ?", (peer_id,)
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _set_received_version(conn: sqlite3.Connection, peer_id: str, version: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO sync_state (peer_id, received_version) VALUES (?, ?)
+        ON CONFLICT (peer_id) DO UPDATE
+        SET received_version = max(received_version, excluded.received_version)
+    """,
+        (peer_id, version),
+    )
+
+
+def _set_acked_version(conn: sqlite3.Connection, peer_id: str, version: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO sync_state (peer_id, acked_version) VALUES (?, ?)
+        ON CONFLICT (peer_id) DO UPDATE
+        SET acked_version = max(acked_version, excluded.acked_version)
+    """,
+        (peer_id, version),
+    )
+
+
+def prune_tombstones(conn: sqlite3.Connection) -> int:
+    """Forgets the tombstones every known peer has already received."""
+    acked = conn.execute("SELECT min(acked_version) FROM sync_state").fetchone()[0]
+    if acked is None:
+        return 0
+    return conn.execute(
+        "DELETE FROM tombstones WHERE row_version <= ?", (acked,)
+    ).rowcount
+
+
+def export_changes(
+    conn: sqlite3.Connection, since: int, skip_origins: Collection[str] = ()
+) -> Changeset:
+    """Collects every row changed after `since`, served by the row_version indexes.
+
+    Rows last received from one of `skip_origins` are left out, those vaults
+    already have them.
+    """
+    to_version = _clock(conn)
+    skip = f"coalesce(origin, '') NOT IN ({', '.join('?' * len(skip_origins))})"
+    categories = conn.execute(
+        f"""
+        SELECT uid, name, updated_at, row_version
+        FROM category
+        WHERE row_version > ? AND {skip}
+        ORDER BY row_version
+    """,
+        (since, *skip_origins),
+    ).fetchall()
+    keybinds = conn.execute(
+        f"""
+        SELECT k.uid, k.keys, k.description, c.uid AS category_uid, k.updated_at,
+            k.row_version
+        FROM keybinds k
+        JOIN category c ON c.id = k.category_id
+        WHERE k.row_version > ? AND {skip.replace("origin", "k.origin")}
+        ORDER BY k.row_version
+    """,
+        (since, *skip_origins),
+    ).fetchall()
+    tombstones = conn.execute(
+        f"""
+        SELECT uid, kind, deleted_at, row_version
+        FROM tombstones
+        WHERE row_version > ? AND {skip}
+        ORDER BY row_version
+    """,
+        (since, *skip_origins),
+    ).fetchall()
+
+    return Changeset(
+        vault_id=_vault_id(conn),
+        from_version=since,
+        to_version=to_version,
+        categories=[dict(row) for row in categories],
+        keybinds=[dict(row) for row in keybinds],
+        tombstones=[dict(row) for row in tombstones],
+    )
+
+
+def _tombstone_time(conn: sqlite3.Connection, uid: str) -> Optional[float]:
+    row = conn.execute(
+        "SELECT deleted_at FROM tombstones WHERE uid = ?", (uid,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _free_name(conn: sqlite3.Connection, uid: str, name: str) -> str:
+    """The name a category can take without clashing with another category.
+
+    Of two categories with the same name, the one with the smaller uid keeps it
+    and the other gets a suffix from its uid, so every vault ends up with the
+    same names whichever side the clash is found on.
+    """
+    other = conn.execute(
+        "SELECT id, uid FROM category WHERE name = ? AND uid != ?", (name, uid)
+    ).fetchone()
+    if other is None:
+        return name
+    if uid < other["uid"]:
+        conn.execute(
+            "UPDATE category SET name = ? WHERE id = ?",
+            (_suffixed(name, other["uid"]), other["id"]),
+        )
+        return name
+    return _suffixed(name, uid)
+
+
+def _suffixed(name: str, uid: str) -> str:
+    return f"{name} ({hashlib.sha1(uid.encode()).hexdigest()[:6]})"
+
+
+def _apply_category(
+    conn: sqlite3.Connection, change: dict, origin: str, report: SyncReport
+) -> bool:
+    local = conn.execute(
+        "SELECT id, name, updated_at FROM category WHERE uid = ?", (change["uid"],)
+    ).fetchone()
+
+    if local is None:
+        deleted_at = _tombstone_time(conn, change["uid"])
+        if deleted_at is not None and deleted_at >= change["updated_at"]:
+            return True
+    elif change["updated_at"] <= local["updated_at"] or change["name"] == local["name"]:
+        return True
+
+    try:
+        name = _free_name(conn, change["uid"], change["name"])
+        if local is None:
+            conn.execute(
+                """
+                INSERT INTO category (name, uid, updated_at, origin)
+                VALUES (?, ?, ?, ?)
+            """,
+                (name, change["uid"], change["updated_at"], origin),
+            )
+        else:
+            conn.execute(
+                "UPDATE category SET name = ?, updated_at = ?, origin = ? WHERE id = ?",
+                (name, change["updated_at"], origin, local["id"]),
+            )
+    except sqlite3.IntegrityError:
+        # The suffixed name is taken as well, it is tried again next sync
+        report.conflicts += 1
+        return False
+    report.applied += 1
+    return True
+
+
+def _apply_keybind(
+    conn: sqlite3.Connection, change: dict, origin: str, report: SyncReport
+) -> bool:
+    category = conn.execute(
+        "SELECT id FROM category WHERE uid = ?", (change["category_uid"],)
+    ).fetchone()
+    if category is None:
+        report.conflicts += 1
+        # Dropped along with a category deleted more recently, otherwise the
+        # category did not apply and the keybind waits for it
+        return _tombstone_time(conn, change["category_uid"]) is not None
+
+    local = conn.execute(
+        "SELECT id, updated_at FROM keybinds WHERE uid = ?", (change["uid"],)
+    ).fetchone()
+
+    if local is None:
+        deleted_at = _tombstone_time(conn, change["uid"])
+        if deleted_at is not None and deleted_at >= change["updated_at"]:
+            return True
+        conn.execute(
+            """
+            INSERT INTO keybinds
+                (keys, description, category_id, uid, updated_at, origin)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            (
+                change["keys"],
+                change["description"],
+                category["id"],
+                change["uid"],
+                change["updated_at"],
+                origin,
+            ),
+        )
+    elif change["updated_at"] > local["updated_at"]:
+        conn.execute(
+            """
+            UPDATE keybinds
+            SET keys = ?, description = ?, category_id = ?, updated_at = ?,
+                origin = ?
+            WHERE id = ?
+        """,
+            (
+                change["keys"],
+                change["description"],
+                category["id"],
+                change["updated_at"],
+                origin,
+                local["id"],
+            ),
+        )
+    else:
+        return True
+    report.applied += 1
+    return True
+
+
+def _apply_tombstone(
+    conn: sqlite3.Connection, change: dict, origin: str, report: SyncReport
+) -> bool:
+    table = "category" if change["kind"] == "category" else "keybinds"
+    local = conn.execute(
+        f"SELECT id, updated_at FROM {table} WHERE uid = ?", (change["uid"],)
+    ).fetchone()
+
+    if local is not None:
+        if local["updated_at"] > change["deleted_at"]:
+            # Edited here after it was deleted there, the edit wins
+            return True
+        conn.execute(f"DELETE FROM {table} WHERE id = ?", (local["id"],))
+        conn.execute(
+            "UPDATE tombstones SET deleted_at = ?, origin = ? WHERE uid = ?",
+            (change["deleted_at"], origin, change["uid"]),
+        )
+    else:
+        deleted_at = _tombstone_time(conn, change["uid"])
+        if deleted_at is not None and deleted_at >= change["deleted_at"]:
+            return True
+        # Keep the tombstone so an older copy of the row is not resurrected later
+        conn.execute("UPDATE vault_meta SET value = value + 1 WHERE key = 'clock'")
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO tombstones
+                (uid, kind, deleted_at, row_version, origin)
+            VALUES (?, ?, ?, (SELECT value FROM vault_meta WHERE key = 'clock'), ?)
+        """,
+            (change["uid"], change["kind"], change["deleted_at"], origin),
+        )
+    report.applied += 1
+    return True
+
+
+def apply_changeset(
+    conn: sqlite3.Connection, changeset: Changeset, report: SyncReport
+) -> None:
+    """Merges a changeset row by row, the most recent write of each row wins."""
+    unapplied = []
+    # Parents first on upserts, children first on deletes
+    for change in changeset.categories:
+        if not _apply_category(conn, change, changeset.vault_id, report):
+            unapplied.append(change)
+    for change in changeset.keybinds:
+        if not _apply_keybind(conn, change, changeset.vault_id, report):
+            unapplied.append(change)
+
+    tombstones = sorted(changeset.tombstones, key=lambda t: t["kind"] == "category")
+    for change in tombstones:
+        _apply_tombstone(conn, change, changeset.vault_id, report)
+
+    # Stop short of the first row that did not apply, so the next sync sends
+    # it again. Changesets from older versions carry no row versions.
+    received = changeset.to_version
+    if unapplied:
+        received = min(
+            change.get("row_version", changeset.from_version + 1) - 1
+            for change in unapplied
+        )
+    _set_received_version(conn, changeset.vault_id, received)
+    report.received += len(changeset)
+
+
+async def sync_with_vault(other: Path, path: Optional[Path] = None) -> SyncReport:
+    """Exchanges the rows changed since the last sync with another vault file."""
+    initialize(other)
+    report = SyncReport()
+
+    with closing(_connect(path)) as local, closing(_connect(other)) as remote:
+        local_id, remote_id = _vault_id(local), _vault_id(remote)
+        if local_id == remote_id:
+            raise ValueError(
+                f"{other} is a copy of this vault, it cannot sync with itself"
+            )
+
+        # Rows each side received from the other are not sent back
+        outgoing = export_changes(
+            local, _received_version(remote, local_id), {remote_id}
+        )
+        incoming = export_changes(
+            remote, _received_version(local, remote_id), {local_id}
+        )
+
+        apply_changeset(local, incoming, report)
+        apply_changeset(remote, outgoing, SyncReport())
+        report.sent = len(outgoing)
+
+        # Each side now knows how far the other got, and can forget the
+        # tombstones all of its peers have seen
+        _set_acked_version(local, remote_id, _received_version(remote, local_id))
+        _set_acked_version(remote, local_id, _received_version(local, remote_id))
+        report.pruned = prune_tombstones(local)
+        prune_tombstones(remote)
+        local.commit()
+        remote.commit()
+
+    reset_caches()
+    return report
+
+
+def _changeset_files(directory: Path) -> list[tuple[str, int, int, Path]]:
+    files = []
+    for file in directory.glob(f"*{CHANGESET_SUFFIX}"):
+        vault_id, from_version, to_version = file.name.removesuffix(
+            CHANGESET_SUFFIX
+        ).split("-")
+        files.append((vault_id, int(from_version), int(to_version), file))
+    return sorted(files, key=lambda f: (f[0], f[1]))
+
+
+async def sync_with_directory(
+    directory: Path, path: Optional[Path] = None
+) -> SyncReport:
+    """Imports changesets written by other vaults and writes this vault's new changes.
+
+    Each vault only ever appends files named after its own id and version range,
+    so the directory can be shared through any file synchronization tool.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    report = SyncReport()
+
+    with closing(_connect(path)) as conn:
+        local_id = _vault_id(conn)
+        files = _changeset_files(directory)
+
+        exported = max(
+            (to for vault_id, _, to, _ in files if vault_id == local_id), default=0
+        )
+        # Rows received from vaults that write here are in their own changesets
+        outgoing = export_changes(
+            conn, exported, {vault_id for vault_id, _, _, _ in files}
+        )
+
+        for vault_id, _, to_version, file in files:
+            if vault_id == local_id or to_version <= _received_version(conn, vault_id):
+                continue
+            changeset = Changeset(**json.loads(file.read_text(encoding="utf-8")))
+            apply_changeset(conn, changeset, report)
+            if local_id in changeset.acks:
+                _set_acked_version(conn, vault_id, changeset.acks[local_id])
+
+        if len(outgoing):
+            outgoing.acks = {
+                row["peer_id"]: row["received_version"]
+                for row in conn.execute(
+                    "SELECT peer_id, received_version FROM sync_state"
+                    " WHERE peer_id NOT LIKE 'dir:%'"
+                )
+            }
+            name = f"{local_id}-{outgoing.from_version}-{outgoing.to_version}{CHANGESET_SUFFIX}"
+            target = directory / name
+            # Write then rename so readers never pick up a partial changeset
+            partial = target.with_suffix(".tmp")
+            partial.write_text(json.dumps(asdict(outgoing)), encoding="utf-8")
+            partial.replace(target)
+            report.sent = len(outgoing)
+
+        # The directory itself counts as a peer, vaults that have not written
+        # here yet still find every tombstone in this vault's changesets
+        _set_acked_version(conn, f"dir:{directory.resolve()}", outgoing.to_version)
+        report.pruned = prune_tombstones(conn)
+        conn.commit()
+
+    reset_caches()
+    return report
+
+
+async def sync(target: Path, path: Optional[Path] = None) -> SyncReport:
+    """Syncs with a vault file, or with a directory of changesets."""
+    if target.is_dir() or (not target.exists() and not target.suffix):
+        return await sync_with_directory(target, path)
+    return await sync_with_vault(target, path)
@@ -0,0 +1,202 @@
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from .sqlite_db import (
+    KEYBIND_COLUMNS,
+    KeyBind,
+    _connect,
+    _keybinds_cache,
+    _retry_locked,
+)
+
+TagId = int
+# One bit per keybind id, AUTOINCREMENT never reuses ids so bits left behind by
+# deleted keybinds can only point at rows that no longer exist
+Bitmap = int
+
+
+@dataclass
+class Tag:
+    id: int
+    name: str
+
+
+# In-memory index, loaded on first use
+_tag_bitmaps: Optional[dict[TagId, Bitmap]] = None
+
+
+def _to_bitmap(keybind_ids: Iterable[int]) -> Bitmap:
+    ids = list(keybind_ids)
+    if not ids:
+        return 0
+    # Setting bits in a buffer avoids one big-int allocation per id
+    buffer = bytearray(max(ids) // 8 + 1)
+    for keybind_id in ids:
+        buffer[keybind_id >> 3] |= 1 << (keybind_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _from_bitmap(bitmap: Bitmap) -> set[int]:
+    ids = set()
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            ids.add((index << 3) + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+def _load_index() -> dict[TagId, Bitmap]:
+    global _tag_bitmaps
+    if _tag_bitmaps is not None:
+        return _tag_bitmaps
+
+    members: dict[TagId, list[int]] = {}
+    with closing(_connect()) as conn:
+        for tag in conn.execute("SELECT id FROM tag"):
+            members[tag["id"]] = []
+        for row in conn.execute("SELECT tag_id, keybind_id FROM keybind_tag"):
+            members[row["tag_id"]].append(row["keybind_id"])
+
+    _tag_bitmaps = {tag_id: _to_bitmap(ids) for tag_id, ids in members.items()}
+    return _tag_bitmaps
+
+
+def reset_tag_index() -> None:
+    """Drops the in-memory index, e.g. after another process changed the vault."""
+    global _tag_bitmaps
+    _tag_bitmaps = None
+
+
+async def get_tags() -> list[Tag]:
+    with closing(_connect()) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM tag ORDER BY name")
+        return [Tag(**dict(row)) for row in cursor.fetchall()]
+
+
+@_retry_locked(failure=None)
+async def insert_tag(name: str) -> Optional[Tag]:
+    try:
+        with closing(_connect()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO tag (name)
+                VALUES (?)
+                RETURNING id, name
+            """,
+                (name,),
+            )
+            row = cursor.fetchone()
+            conn.commit()
+            if row:
+                _load_index()[row["id"]] = 0
+                return Tag(**dict(row))
+    except sqlite3.IntegrityError as e:
+        print(f"Insert error (tag): {e}")
+    return None
+
+
+@_retry_locked(failure=False)
+async def delete_tag(tag_id: int) -> bool:
+    try:
+        with closing(_connect()) as conn:
+            conn.execute("DELETE FROM tag WHERE id = ?", (tag_id,))
+            conn.commit()
+
+        _load_index().pop(tag_id, None)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Delete error (tag): {e}")
+    return False
+
+
+@_retry_locked(failure=False)
+async def tag_keybinds(keybind_ids: list[int], tag_id: int) -> bool:
+    if not keybind_ids:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO keybind_tag (keybind_id, tag_id) VALUES (?, ?)",
+                [(kid, tag_id) for kid in keybind_ids],
+            )
+            conn.commit()
+
+        index = _load_index()
+        index[tag_id] = index.get(tag_id, 0) | _to_bitmap(keybind_ids)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Insert error (keybind tag): {e}")
+    return False
+
+
+@_retry_locked(failure=False)
+async def untag_keybinds(keybind_ids: list[int], tag_id: int) -> bool:
+    if not keybind_ids:
+        return False
+
+    try:
+        with closing(_connect()) as conn:
+            conn.executemany(
+                "DELETE FROM keybind_tag WHERE keybind_id = ? AND tag_id = ?",
+                [(kid, tag_id) for kid in keybind_ids],
+            )
+            conn.commit()
+
+        index = _load_index()
+        index[tag_id] = index.get(tag_id, 0) & ~_to_bitmap(keybind_ids)
+        return True
+    except sqlite3.IntegrityError as e:
+        print(f"Delete error (keybind tag): {e}")
+    return False
+
+
+def filter_keybind_ids(tag_ids: Iterable[int], match_all: bool = True) -> set[int]:
+    """Ids of the keybinds carrying all (AND) or any (OR) of the tags."""
+    index = _load_index()
+    bitmaps = [index.get(tag_id, 0) for tag_id in tag_ids]
+    if not bitmaps:
+        return set()
+
+    result = bitmaps[0]
+    for bitmap in bitmaps[1:]:
+        result = result & bitmap if match_all else result | bitmap
+    return _from_bitmap(result)
+
+
+async def get_keybinds_by_tags(
+    tag_ids: Iterable[int],
+    match_all: bool = True,
+    category_id: Optional[int] = None,
+) -> list[KeyBind]:
+    keybind_ids = filter_keybind_ids(tag_ids, match_all)
+    if not keybind_ids:
+        return []
+
+    if category_id is not None and category_id in _keybinds_cache:
+        return [
+            keybind
+            for keybind_id, keybind in _keybinds_cache[category_id].items()
+            if keybind_id in keybind_ids
+        ]
+
+    sql = f"""
+        SELECT {KEYBIND_COLUMNS}
+        FROM keybinds
+        WHERE id IN (SELECT value FROM json_each(?))
+    """
+    params: list = [f"[{','.join(map(str, keybind_ids))}]"]
+    if category_id is not None:
+        sql += " AND category_id = ?"
+        params.append(category_id)
+
+    with closing(_connect()) as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql + " ORDER BY id", params)
+        return [KeyBind(**dict(row)) for row in cursor.fetchall()]
@@ -0,0 +1,107 @@
+import math
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from .sqlite_db import KeybindId, _bump_cache_generation, _connect, _keybinds_cache
+
+# Seconds between batched counter writes while the TUI is running
+FLUSH_INTERVAL = 30.0
+# A lookup loses half of its weight every two weeks
+FRECENCY_HALF_LIFE = 14 * 24 * 60 * 60
+# Scores are measured from a fixed point in time so stored values never need
+# to be decayed: ranking by ln(sum(e^(t_i / tau))) is the same at any "now"
+FRECENCY_EPOCH = 1_700_000_000.0
+_TAU = FRECENCY_HALF_LIFE / math.log(2)
+
+
+@dataclass
+class _PendingUsage:
+    count: int
+    last_used: float
+    score: float
+
+
+_pending_usage: dict[KeybindId, _PendingUsage] = {}
+_pending_lock = threading.Lock()
+
+
+def _logaddexp(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _lookup_score(timestamp: float) -> float:
+    return (timestamp - FRECENCY_EPOCH) / _TAU
+
+
+def record_usage(keybind_ids: Iterable[int], timestamp: Optional[float] = None) -> None:
+    """Buffers a lookup of each keybind, nothing is written until the next flush."""
+    now = time.time() if timestamp is None else timestamp
+    score = _lookup_score(now)
+
+    with _pending_lock:
+        for keybind_id in keybind_ids:
+            pending = _pending_usage.get(keybind_id)
+            if pending is None:
+                _pending_usage[keybind_id] = _PendingUsage(1, now, score)
+            else:
+                pending.count += 1
+                pending.last_used = max(pending.last_used, now)
+                pending.score = _logaddexp(pending.score, score)
+
+
+def flush_usage() -> int:
+    """Writes every buffered lookup in a single batched UPDATE and returns how many keybinds changed."""
+    with _pending_lock:
+        if not _pending_usage:
+            return 0
+        pending = dict(_pending_usage)
+        _pending_usage.clear()
+
+    try:
+        with closing(_connect()) as conn:
+            conn.create_function("logaddexp", 2, _logaddexp, deterministic=True)
+            conn.executemany(
+                """
+                UPDATE keybinds
+                SET use_count = use_count + ?,
+                    last_used = max(coalesce(last_used, 0), ?),
+                    frecency = logaddexp(frecency, ?)
+                WHERE id = ?
+            """,
+                [
+                    (usage.count, usage.last_used, usage.score, keybind_id)
+                    for keybind_id, usage in pending.items()
+                ],
+            )
+            conn.commit()
+    except sqlite3.OperationalError as e:
+        # Put the counters back so they are retried on the next flush
+        with _pending_lock:
+            for keybind_id, usage in pending.items():
+                current = _pending_usage.get(keybind_id)
+                if current is not None:
+                    usage.count += current.count
+                    usage.last_used = max(usage.last_used, current.last_used)
+                    usage.score = _logaddexp(usage.score, current.score)
+                _pending_usage[keybind_id] = usage
+        print(f"Flush error (usage): {e}")
+        return 0
+
+    _bump_cache_generation()
+    # Mirror the same update on cached keybinds so frecency sorts stay correct
+    for keybinds in _keybinds_cache.values():
+        for keybind_id, usage in pending.items():
+            keybind = keybinds.get(keybind_id)
+            if keybind is not None:
+                keybind.frecency = _logaddexp(keybind.frecency, usage.score)
+
+    return len(pending)
@@ -1,37 +1,71 @@
+import sqlite3
+import time
+from functools import partial
 from typing import Optional
 
+from rich.text import Text
 from textual import on
+from textual.worker import get_current_worker
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal
 from textual.coordinate import Coordinate
 from textual.theme import Theme
-from textual.widgets import Header, Footer, DataTable, ListView, ListItem, Label
+from textual.widget import Widget
+from textual.widgets import Header, Footer, DataTable
+from textual.widgets.data_table import RowKey
 
 from keybind_vault.db import (
+    FLUSH_INTERVAL,
+    IDLE_AFTER,
+    IDLE_CHECK_INTERVAL,
+    PREFETCH_DELAY,
     Category,
     KeyBind,
+    KeybindOrder,
+    flush_usage,
     get_categories,
+    get_category,
+    get_empty_categories,
     get_keybinds_by_category,
+    get_prefetch_stats,
     insert_category,
     insert_keybind,
-    initialize,
+    delete_categories,
     delete_category,
     delete_keybind,
+    delete_keybinds,
+    filter_keybind_ids,
+    get_tags,
+    idle_maintenance,
+    insert_tag,
+    move_keybinds,
+    load_prefetch,
+    read_with_retries,
+    record_usage,
+    record_visit,
+    store_prefetch,
+    tag_keybinds,
     update_category,
     update_keybind,
+    update_keybind_descriptions,
 )
-
+from keybind_vault.timings import ActionTimings, RenderMode
+from keybind_vault.widgets import CategoryList
 from keybind_vault.modals import (
     SearchScreen,
     EditScreen,
     DeleteScreen,
     AddScreen,
+    MoveScreen,
+    TagFilterScreen,
+    TagScreen,
     KeybindField,
     Mode,
 )
 
 
 COLUMNS = ("Keys", "Description")
+SELECTED_STYLE = "bold reverse"
 
 
 class KeybindVaultApp(App):
@@ -46,6 +80,13 @@ class KeybindVaultApp(App):
         ("a", "add", "Add"),
         ("e", "edit", "Edit"),
         ("x", "delete", "Delete"),
+        ("space", "toggle_select", "Select"),
+        ("m", "move", "Move"),
+        ("c", "copy", "Copy keys"),
+        ("f", "toggle_frecency", "Sort by use"),
+        ("t", "tag", "Tag"),
+        ("T", "filter_tags", "Filter by tags"),
+        ("E", "empty_categories", "Empty categories"),
         ("g", "remove_filter", "Remove filter"),
     ]
 
@@ -69,53 +110,85 @@ class KeybindVaultApp(App):
         },
     )
 
-    def compose(self) -> ComposeResult:
-        self.list_view = ListView(id="categories")
-        self.list_view.styles.opacity = 0
+    def __init__(self, render_mode: RenderMode = RenderMode.AUTO) -> None:
+        super().__init__()
+        self.render_mode = render_mode
+        self.timings = ActionTimings()
+        # TEXTUAL_ANIMATIONS=none asks for the same thing
+        if render_mode == RenderMode.PERFORMANCE or self.animation_level == "none":
+            self.use_performance_mode()
+
+    def use_performance_mode(self) -> None:
+        """Drops the fades, every change is painted in a single frame."""
+        self.render_mode = RenderMode.PERFORMANCE
+        self.animation_level = "none"
+
+    def fade_in(self, widget: Widget, duration: float) -> None:
+        if self.render_mode == RenderMode.PERFORMANCE:
+            widget.styles.opacity = 1
+            return
+        widget.styles.animate(
+            "opacity", value=1, duration=duration, easing="in_out_quart"
+        )
 
+    def record_timing(self, action: str, start: float) -> None:
+        """Times an action up to now, and up to the repaint that shows its result."""
+        handler = time.perf_counter() - start
+        self.call_after_refresh(self.finish_timing, action, start, handler)
+
+    def finish_timing(self, action: str, start: float, handler: float) -> None:
+        self.timings.record(action, handler, time.perf_counter() - start)
+
+        if self.render_mode == RenderMode.AUTO and self.timings.frames_are_slow():
+            self.use_performance_mode()
+            self.notify(
+                "Repaints are slow here, animations were turned off.",
+                title="Performance Mode",
+                severity="information",
+            )
+
+    def compose(self) -> ComposeResult:
+        self.category_list = CategoryList(id="categories")
         self.data_table = DataTable(id="keybinds", zebra_stripes=True)
-        self.data_table.styles.opacity = 0
+        if self.render_mode != RenderMode.PERFORMANCE:
+            self.category_list.styles.opacity = 0
+            self.data_table.styles.opacity = 0
 
         self.current_categories: dict[int, str] = {}
         self.current_keybinds: dict[str, tuple[str, str]] = {}
+        # Row keys of the keybinds marked for a bulk action
+        self.selected_keybinds: set[str] = set()
+        self.keybind_order = KeybindOrder.INSERTION
 
         yield Header(show_clock=True)
-        yield Horizontal(self.list_view, self.data_table)
+        yield Horizontal(self.category_list, self.data_table)
         yield Footer()
 
     async def on_mount(self) -> None:
         # Register the theme
         self.register_theme(self.obsidian_night_theme)
 
-        categories = await get_categories()
-        list_items = [
-            ListItem(
-                Label(category.name, classes="category-item"), id=f"id-{category.id}"
-            )
-            for category in categories
-        ]
+        # Usage counters are buffered in memory and written in batches
+        self.set_interval(FLUSH_INTERVAL, flush_usage)
+
+        # Free pages left by deletes are reclaimed a few at a time while idle
+        self.last_activity = time.monotonic()
+        self.set_interval(IDLE_CHECK_INTERVAL, self.run_idle_maintenance)
+
+        categories = await self.read_vault(get_categories) or []
         self.current_categories = {
             category.id: category.name for category in categories
         }
 
-        await self.list_view.extend(list_items)
+        self.column_keys = self.data_table.add_columns(*COLUMNS)
 
-        self.list_view.styles.animate(
-            "opacity", value=1, duration=0.7, easing="in_out_quart"
+        # Highlights the first category, which loads its keybinds
+        self.category_list.set_categories(
+            self.current_categories,
+            {category.id: category.keybind_count for category in categories},
         )
 
-        general_keybinds = await get_keybinds_by_category(1)
-
-        self.data_table.add_columns(*COLUMNS)
-
-        for keybind in general_keybinds:
-            key_id = str(keybind.id)
-            self.current_keybinds[key_id] = (keybind.keys, keybind.description)
-            self.data_table.add_row(keybind.keys, keybind.description, key=key_id)
-
-        self.data_table.styles.animate(
-            "opacity", value=1, duration=0.7, easing="in_out_quart"
-        )
+        self.fade_in(self.category_list, 0.7)
 
         # Quick workaround — initializing a modal with 2 inputs help the others that only one 1
         # TODO delete later when a fix is found
@@ -124,57 +197,94 @@ class KeybindVaultApp(App):
         await self.push_screen(fix_screen, lambda x: x)
         fix_screen.dismiss(None)
 
+    def on_unmount(self) -> None:
+        stats = get_prefetch_stats()
+        self.log(
+            f"Prefetch: {stats.hits} hits, {stats.misses} misses "
+            f"({stats.hit_rate:.0%}), {stats.loaded} loaded, {stats.evicted} evicted",
+            stats,
+        )
+        self.log(f"Render mode: {self.render_mode.value}", *self.timings.summary())
+
+    def on_key(self) -> None:
+        self.last_activity = time.monotonic()
+
+    def run_idle_maintenance(self) -> None:
+        if time.monotonic() - self.last_activity < IDLE_AFTER:
+            return
+
+        self.run_worker(
+            idle_maintenance, thread=True, group="maintenance", exclusive=True
+        )
+
     def action_toggle_dark(self) -> None:
         """An action to toggle dark mode."""
         self.theme = (
             "textual-dark" if self.theme == "textual-light" else "textual-light"
         )
 
-    @on(ListView.Highlighted)
+    @on(CategoryList.Highlighted)
     async def change_category(self):
-        category = self.list_view.highlighted_child
+        category_id = self.category_list.highlighted_id
 
-        if category is None:
+        if category_id is None:
             return
 
+        start = time.perf_counter()
         self.data_table.clear()
-        self.data_table.styles.opacity = 0
-
-        new_keybinds = await get_keybinds_by_category(int(category.id.split("-")[-1]))
+        self.selected_keybinds.clear()
         self.current_keybinds = {}
 
+        record_visit(category_id)
+        new_keybinds = await self.read_vault(
+            get_keybinds_by_category, category_id, self.keybind_order
+        )
+        if new_keybinds is None:
+            return
+
+        if self.render_mode != RenderMode.PERFORMANCE:
+            self.data_table.styles.opacity = 0
+
         for keybind in new_keybinds:
             key_str = str(keybind.id)
             self.current_keybinds[key_str] = (keybind.keys, keybind.description)
-            self.data_table.add_row(
-                keybind.keys, keybind.description, key=str(keybind.id)
-            )
+            self.add_keybind_row(key_str)
+
+        self.fade_in(self.data_table, 0.5)
+        self.record_timing("switch", start)
 
-        self.data_table.styles.animate(
-            "opacity", value=1, duration=0.5, easing="in_out_quart"
+        # The next visit is most likely one row up or down
+        self.run_worker(
+            partial(self.prefetch_categories, self.category_list.adjacent_ids()),
+            thread=True,
+            group="prefetch",
+            exclusive=True,
         )
 
+    def prefetch_categories(self, category_ids: list[int]) -> None:
+        worker = get_current_worker()
+        time.sleep(PREFETCH_DELAY)
+        for category_id in category_ids:
+            # Cancelled as soon as another category is highlighted
+            if worker.is_cancelled:
+                return
+            prefetch = load_prefetch(category_id)
+            if prefetch is not None:
+                # The cache is only ever changed on the UI thread, like the writes
+                self.call_from_thread(store_prefetch, prefetch)
+
     async def action_search(self):
         focused = self.screen.focused
 
         highlighted_col_index = self.data_table.cursor_column
 
         async def search_cat(result: str | None) -> None:
+            start = time.perf_counter()
             if not result:
-                await self.reset_displayed_categories()
-                self.list_view.index = 0
-                return
-
-            await self.list_view.clear()
-
-            # Re-making ListItems objects because reusing causes a display bug
-            matching_items = [
-                ListItem(Label(category, classes="category-item"), id=f"id-{id}")
-                for id, category in self.current_categories.items()
-                if category.lower().startswith(result.lower())
-            ]
-
-            await self.list_view.extend(matching_items)
+                self.category_list.reset()
+            else:
+                self.category_list.filter_prefix(result)
+            self.record_timing("filter", start)
 
         async def search_keyb(result: str | None) -> None:
             if not result:
@@ -184,13 +294,22 @@ class KeybindVaultApp(App):
             if highlighted_col_index not in (0, 1):
                 return
 
+            start = time.perf_counter()
+            # A selection hidden by the filter must not be acted on
+            self.selected_keybinds.clear()
             self.data_table.clear()
-            for keyb_key, keyb in self.current_keybinds.items():
-                if result.lower() in keyb[highlighted_col_index].lower():
-                    self.data_table.add_row(keyb[0], keyb[1], key=keyb_key)
+            matches = [
+                keyb_key
+                for keyb_key, keyb in self.current_keybinds.items()
+                if result.lower() in keyb[highlighted_col_index].lower()
+            ]
+            for keyb_key in matches:
+                self.add_keybind_row(keyb_key)
+            record_usage(int(keyb_key) for keyb_key in matches)
             self.data_table.cursor_coordinate = Coordinate(0, 0)
+            self.record_timing("filter", start)
 
-        if focused == self.list_view:
+        if focused == self.category_list:
             await self.push_screen(SearchScreen(Mode.CATEGORY), search_cat)
         elif focused == self.data_table:
             await self.push_screen(
@@ -204,24 +323,277 @@ class KeybindVaultApp(App):
             )
 
     async def action_remove_filter(self) -> None:
-        await self.reset_displayed_categories()
+        start = time.perf_counter()
+        self.category_list.reset()
         self.reset_displayed_keybinds()
-
-    async def reset_displayed_categories(self) -> None:
-        await self.list_view.clear()
-
-        # Re-making ListItems objects because reusing causes a display bug
-        items = [
-            ListItem(Label(category, classes="category-item"), id=f"id-{id}")
-            for id, category in self.current_categories.items()
-        ]
-        await self.list_view.extend(items)
+        self.record_timing("filter", start)
 
     def reset_displayed_keybinds(self) -> None:
         self.data_table.clear()
 
-        for keyb_key, keyb in self.current_keybinds.items():
-            self.data_table.add_row(keyb[0], keyb[1], key=keyb_key)
+        for keyb_key in self.current_keybinds:
+            self.add_keybind_row(keyb_key)
+
+    def current_category_id(self) -> Optional[int]:
+        return self.category_list.highlighted_id
+
+    async def read_vault(self, read, *args):
+        """Runs a read for the UI, a vault that stays locked gives a warning and None."""
+        try:
+            return await read_with_retries(read, *args)
+        except sqlite3.OperationalError as e:
+            self.notify(
+                f"Could not read the vault ({e}). Please try again.",
+                title="Read Failed",
+                severity="warning",
+            )
+            return None
+
+    async def refresh_category_counts(self, *category_ids: int) -> None:
+        # Served from the category cache, the counts are never recounted
+        for category_id in category_ids:
+            category = await self.read_vault(get_category, category_id)
+            if category is not None:
+                self.category_list.set_count(category_id, category.keybind_count)
+
+    def cursor_row_key(self) -> Optional[RowKey]:
+        if self.data_table.row_count == 0:
+            return None
+        return self.data_table.coordinate_to_cell_key(
+            self.data_table.cursor_coordinate
+        ).row_key
+
+    def keybind_cells(self, key: str) -> tuple[str | Text, str | Text]:
+        keys, description = self.current_keybinds[key]
+        if key in self.selected_keybinds:
+            return Text(keys, style=SELECTED_STYLE), Text(
+                description or "", style=SELECTED_STYLE
+            )
+        return keys, description
+
+    def add_keybind_row(self, key: str) -> None:
+        self.data_table.add_row(*self.keybind_cells(key), key=key)
+
+    def refresh_keybind_row(self, key: str) -> None:
+        for column_key, value in zip(self.column_keys, self.keybind_cells(key)):
+            self.data_table.update_cell(key, column_key, value)
+
+    def remove_keybind_rows(self, keys: list[str]) -> None:
+        for key in keys:
+            self.current_keybinds.pop(key, None)
+            self.selected_keybinds.discard(key)
+            if key in self.data_table.rows:
+                self.data_table.remove_row(key)
+
+    def action_toggle_select(self) -> None:
+        if self.screen.focused != self.data_table:
+            return
+
+        row_key = self.cursor_row_key()
+        if row_key is None:
+            return
+
+        key = row_key.value
+        if key in self.selected_keybinds:
+            self.selected_keybinds.remove(key)
+        else:
+            self.selected_keybinds.add(key)
+        self.refresh_keybind_row(key)
+
+    async def action_move(self) -> None:
+        if self.screen.focused != self.data_table:
+            return
+
+        category_id = self.current_category_id()
+        if category_id is None:
+            return
+
+        keys = self.selected_keybinds_or_cursor()
+        if not keys:
+            return
+
+        async def move_keyb(result: int | None) -> None:
+            if result is None:
+                return
+
+            success = await move_keybinds(
+                [int(key) for key in keys], category_id, result
+            )
+            if not success:
+                self.notify(
+                    "Failed to move keybinds. Please try again.",
+                    title="Move Failed",
+                    severity="warning",
+                )
+                return
+
+            self.remove_keybind_rows(keys)
+            await self.refresh_category_counts(category_id, result)
+            self.notify(
+                f"Moved {len(keys)} keybind(s) to '{self.current_categories[result]}'.",
+                title="Keybinds Moved",
+                severity="information",
+            )
+
+        targets = {
+            cat_id: name
+            for cat_id, name in self.current_categories.items()
+            if cat_id != category_id
+        }
+        await self.push_screen(MoveScreen(targets, len(keys)), move_keyb)
+
+    def action_copy(self) -> None:
+        if self.screen.focused != self.data_table:
+            return
+
+        row_key = self.cursor_row_key()
+        if row_key is None:
+            return
+
+        keys = self.current_keybinds[row_key.value][0]
+        self.copy_to_clipboard(keys)
+        record_usage([int(row_key.value)])
+        self.notify(f"Copied '{keys}' to the clipboard.", title="Keybind Copied")
+
+    async def action_toggle_frecency(self) -> None:
+        if self.keybind_order == KeybindOrder.FRECENCY:
+            self.keybind_order = KeybindOrder.INSERTION
+        else:
+            self.keybind_order = KeybindOrder.FRECENCY
+            # Make the ranking reflect lookups that are still buffered
+            flush_usage()
+
+        await self.change_category()
+
+    async def action_tag(self) -> None:
+        if self.screen.focused != self.data_table:
+            return
+
+        keys = self.selected_keybinds_or_cursor()
+        if not keys:
+            return
+
+        async def tag_keyb(result: list[str] | None) -> None:
+            if not result:
+                return
+
+            tags = await self.read_vault(get_tags)
+            if tags is None:
+                return
+
+            tag_ids = {tag.name: tag.id for tag in tags}
+            keybind_ids = [int(key) for key in keys]
+            tagged, failed = [], []
+
+            for name in result:
+                if name not in tag_ids:
+                    tag = await insert_tag(name)
+                    if tag is None:
+                        failed.append(name)
+                        continue
+                    tag_ids[name] = tag.id
+                if await tag_keybinds(keybind_ids, tag_ids[name]):
+                    tagged.append(name)
+                else:
+                    failed.append(name)
+
+            if failed:
+                self.notify(
+                    f"Failed to tag with {', '.join(failed)}. Please try again.",
+                    title="Tag Failed",
+                    severity="warning",
+                )
+            if tagged:
+                self.notify(
+                    f"Tagged {len(keys)} keybind(s) with {', '.join(tagged)}.",
+                    title="Keybinds Tagged",
+                    severity="information",
+                )
+
+        await self.push_screen(TagScreen(len(keys)), tag_keyb)
+
+    async def action_filter_tags(self) -> None:
+        tags = await self.read_vault(get_tags)
+        if tags is None:
+            return
+        if not tags:
+            self.notify(
+                "Tag some keybinds first with 't'.",
+                title="No Tags",
+                severity="warning",
+            )
+            return
+
+        async def filter_keyb(result: tuple[list[int], bool] | None) -> None:
+            if not result or not result[0]:
+                return
+
+            start = time.perf_counter()
+            tag_ids, match_all = result
+            matching_ids = await self.read_vault(filter_keybind_ids, tag_ids, match_all)
+            if matching_ids is None:
+                return
+
+            self.selected_keybinds.clear()
+            self.data_table.clear()
+            for keyb_key in self.current_keybinds:
+                if int(keyb_key) in matching_ids:
+                    self.add_keybind_row(keyb_key)
+            self.record_timing("filter", start)
+
+        await self.push_screen(
+            TagFilterScreen({tag.id: tag.name for tag in tags}), filter_keyb
+        )
+
+    def selected_keybinds_or_cursor(self) -> list[str]:
+        if self.selected_keybinds:
+            # Keep table order so the notifications and diffs are predictable
+            return [
+                key
+                for key in self.current_keybinds
+                if key in self.selected_keybinds and key in self.data_table.rows
+            ]
+
+        row_key = self.cursor_row_key()
+        return [] if row_key is None else [row_key.value]
+
+    async def action_empty_categories(self) -> None:
+        empty_categories = await self.read_vault(get_empty_categories)
+        if empty_categories is None:
+            return
+
+        empty = [category.id for category in empty_categories]
+        if not empty:
+            self.notify(
+                "Every category has keybinds.",
+                title="No Empty Categories",
+                severity="information",
+            )
+            return
+
+        self.category_list.show_only(empty)
+        self.category_list.focus()
+
+        async def delete_empty(result: bool | None) -> None:
+            if not result:
+                # Leave the empty categories on display
+                return
+
+            if not await delete_categories(empty):
+                return
+
+            for category_id in empty:
+                self.current_categories.pop(category_id, None)
+                self.category_list.remove(category_id)
+            self.category_list.reset()
+
+            self.notify(
+                f"{len(empty)} empty categories deleted successfully.",
+                title="Categories Deleted",
+                severity="information",
+            )
+
+        await self.push_screen(DeleteScreen(Mode.CATEGORY, len(empty)), delete_empty)
 
     async def action_add(self) -> None:
         focused = self.screen.focused
@@ -239,19 +611,8 @@ class KeybindVaultApp(App):
                 )
                 return
 
-            new_list_item = ListItem(
-                Label(category.name, classes="category-item"),
-                id=f"id-{category.id}",
-            )
-            new_list_item.styles.opacity = 0
-
             self.current_categories[category.id] = category.name
-
-            await self.list_view.append(new_list_item)
-
-            new_list_item.styles.animate(
-                "opacity", value=1, duration=0.7, easing="in_out_quart"
-            )
+            self.category_list.add(category.id, category.name)
 
             self.notify(
                 f"Category '{category.name}' was successfully added.",
@@ -263,11 +624,10 @@ class KeybindVaultApp(App):
             if result is None:
                 return
 
-            highlighted = self.list_view.highlighted_child
-            if not highlighted:
+            category_id = self.current_category_id()
+            if category_id is None:
                 return
 
-            category_id = int(highlighted.id.split("-")[-1])
             keybind: Optional[KeyBind] = await insert_keybind(
                 result[0], result[1], category_id
             )
@@ -279,9 +639,10 @@ class KeybindVaultApp(App):
                 )
                 return
 
-            self.data_table.add_row(
-                keybind.keys, keybind.description, key=str(keybind.id)
-            )
+            key_str = str(keybind.id)
+            self.current_keybinds[key_str] = (keybind.keys, keybind.description)
+            self.add_keybind_row(key_str)
+            await self.refresh_category_counts(category_id)
 
             self.notify(
                 f"Keybind '{keybind.keys}' was successfully added.",
@@ -289,7 +650,7 @@ class KeybindVaultApp(App):
                 severity="information",
             )
 
-        if focused == self.list_view:
+        if focused == self.category_list:
             await self.push_screen(AddScreen(Mode.CATEGORY), add_cat)
         elif focused == self.data_table:
             await self.push_screen(AddScreen(Mode.KEYBIND), add_keyb)
@@ -301,9 +662,9 @@ class KeybindVaultApp(App):
             if not result:
                 return
 
-            highlighted = self.list_view.highlighted_child
-
-            category_id = int(highlighted.id.split("-")[-1])
+            category_id = self.current_category_id()
+            if category_id is None:
+                return
 
             success = await delete_category(category_id)
 
@@ -311,6 +672,7 @@ class KeybindVaultApp(App):
                 return
 
             self.current_categories.pop(category_id)
+            self.category_list.remove(category_id)
 
             self.notify(
                 "Category deleted successfully.",
@@ -318,53 +680,60 @@ class KeybindVaultApp(App):
                 severity="information",
             )
 
-            async def delete():
-                await highlighted.remove()
-
-
-            highlighted.styles.animate(
-                "opacity",
-                value=0.0,
-                duration=1,
-                on_complete=delete,
-                easing="in_out_quart",
-            )
-
         async def delete_keyb(result: bool | None) -> None:
             if not result:
                 return
 
-            highlighted = self.list_view.highlighted_child
-            if not highlighted:
+            category_id = self.current_category_id()
+            if category_id is None:
                 return
 
-            category_id = int(highlighted.id.split("-")[-1])
+            row_key = self.cursor_row_key()
+            if row_key is None:
+                return
 
-            highlighted_row_index = self.data_table.cursor_row
-            highlighted_row = None
+            success = await delete_keybind(int(row_key.value), category_id)
 
-            for i, row in enumerate(self.data_table.ordered_rows):
-                if i == highlighted_row_index:
-                    highlighted_row = row
-                    break
+            if not success:
+                return
+
+            self.remove_keybind_rows([row_key.value])
+            await self.refresh_category_counts(category_id)
+            self.notify(
+                "Keybind deleted successfully.",
+                title="Keybind Deleted",
+                severity="information",
+            )
 
-            if not highlighted_row:
+        async def delete_selected_keyb(result: bool | None) -> None:
+            if not result:
+                return
+
+            category_id = self.current_category_id()
+            if category_id is None:
                 return
 
-            success = await delete_keybind(int(highlighted_row.key.value), category_id)
+            keys = self.selected_keybinds_or_cursor()
+            success = await delete_keybinds([int(key) for key in keys], category_id)
 
             if not success:
                 return
 
-            self.data_table.remove_row(highlighted_row.key)
+            self.remove_keybind_rows(keys)
+            await self.refresh_category_counts(category_id)
             self.notify(
-                "Keybind deleted successfully.",
-                title="Keybind Deleted",
+                f"{len(keys)} keybinds deleted successfully.",
+                title="Keybinds Deleted",
                 severity="information",
             )
 
-        if focused == self.list_view:
+        if focused == self.category_list:
             await self.push_screen(DeleteScreen(Mode.CATEGORY), delete_cat)
+        elif focused == self.data_table and self.selected_keybinds:
+            await self.push_screen(
+                DeleteScreen(Mode.KEYBIND, len(self.selected_keybinds_or_cursor())),
+                delete_selected_keyb,
+            )
         elif focused == self.data_table:
             await self.push_screen(DeleteScreen(Mode.KEYBIND), delete_keyb)
 
@@ -375,72 +744,53 @@ class KeybindVaultApp(App):
             if not result:
                 return
 
-            highlighted = self.list_view.highlighted_child
-
-            if not highlighted:
+            category_id = self.current_category_id()
+            if category_id is None:
                 return
 
-            category_id = int(highlighted.id.split("-")[-1])
-
+            start = time.perf_counter()
             category_res = await update_category(result, category_id)
 
             if category_res is None:
                 return
 
             self.current_categories[category_id] = category_res.name
+            self.category_list.rename(category_id, category_res.name)
+            self.record_timing("edit", start)
 
-            label = highlighted.query_one(Label)
-            label.styles.opacity = 0
-
-            def update():
-                label.update(category_res.name)
-
-                self.notify(
-                    f"Category renamed to '{category_res.name}'.",
-                    title="Category Updated",
-                    severity="information",
-                )
-
-            label.styles.animate(
-                "opacity",
-                value=1,
-                duration=0.7,
-                easing="in_out_quart",
-                on_complete=update,
+            self.notify(
+                f"Category renamed to '{category_res.name}'.",
+                title="Category Updated",
+                severity="information",
             )
 
         async def edit_keyb(result: tuple[str, str] | None) -> None:
             if not result:
                 return
 
-            highlighted_cat = self.list_view.highlighted_child
-            if not highlighted_cat:
+            category_id = self.current_category_id()
+            if category_id is None:
                 return
 
-            category_id = int(highlighted_cat.id.split("-")[-1])
-
-            row_index = self.data_table.cursor_row
-            if row_index is None:
+            row_key = self.cursor_row_key()
+            if row_key is None:
                 return
 
-            row = self.data_table.ordered_rows[row_index]
-
-            keybind_id = int(row.key.value)
-
+            start = time.perf_counter()
             updated_keybind = await update_keybind(
-                keybind_id=keybind_id,
+                keybind_id=int(row_key.value),
                 keys=result[0],
                 description=result[1],
                 category_id=category_id,
             )
 
             if updated_keybind:
-                self.data_table.remove_row(row.key)
-                self.data_table.add_row(
+                self.current_keybinds[row_key.value] = (
                     updated_keybind.keys,
                     updated_keybind.description,
-                    key=str(updated_keybind.id),
                 )
+                self.refresh_keybind_row(row_key.value)
+                self.record_timing("edit", start)
                 self.notify(
                     f"Keybind '{updated_keybind.keys}' updated successfully.",
                     title="Keybind Updated",
@@ -452,31 +802,65 @@ class KeybindVaultApp(App):
                     title="Update Failed",
                     severity="warning",
                 )
+
+        async def edit_selected_keyb(result: str | None) -> None:
+            # An empty description would wipe every selected keybind
+            if not result:
                 return
 
-            self.data_table.cursor_coordinate = Coordinate(row_index, 0)
+            category_id = self.current_category_id()
+            if category_id is None:
+                return
+
+            start = time.perf_counter()
+            keys = self.selected_keybinds_or_cursor()
+            success = await update_keybind_descriptions(
+                [int(key) for key in keys], result, category_id
+            )
 
-        if focused == self.list_view:
-            highlighted = self.list_view.highlighted_child
+            if not success:
+                self.notify(
+                    "Failed to update keybinds. Please try again.",
+                    title="Update Failed",
+                    severity="warning",
+                )
+                return
+
+            for key in keys:
+                self.current_keybinds[key] = (self.current_keybinds[key][0], result)
+                if key in self.data_table.rows:
+                    self.refresh_keybind_row(key)
+            self.record_timing("edit", start)
+
+            self.notify(
+                f"{len(keys)} keybind descriptions updated successfully.",
+                title="Keybinds Updated",
+                severity="information",
+            )
+
+        if focused == self.category_list:
+            category_id = self.current_category_id()
+            if category_id is None:
+                return
 
             await self.push_screen(
-                EditScreen(Mode.CATEGORY, highlighted.query_one(Label).renderable),
+                EditScreen(Mode.CATEGORY, self.current_categories[category_id]),
                 edit_cat,
             )
+        elif focused == self.data_table and self.selected_keybinds:
+            await self.push_screen(EditScreen(Mode.DESCRIPTION, ""), edit_selected_keyb)
         elif focused == self.data_table:
-            row_index = self.data_table.cursor_row
-            if row_index is None:
+            row_key = self.cursor_row_key()
+            if row_key is None:
                 return
 
-            row = self.data_table.get_row_at(row_index)
-            await self.push_screen(EditScreen(Mode.KEYBIND, row[0], row[1]), edit_keyb)
-
-
-def main() -> None:
-    initialize()
-    app = KeybindVaultApp()
-    app.run()
+            keys, description = self.current_keybinds[row_key.value]
+            await self.push_screen(
+                EditScreen(Mode.KEYBIND, keys, description), edit_keyb
+            )
 
 
 if __name__ == "__main__":
+    from keybind_vault.cli import main
+
     main()
@@ -1,7 +1,10 @@
 from .add_modal import AddScreen
 from .delete_modal import DeleteScreen
 from .edit_modal import EditScreen
+from .move_modal import MoveScreen
 from .search_modal import SearchScreen
+from .tag_filter_modal import TagFilterScreen
+from .tag_modal import TagScreen
 from .vault_types import KeybindField, Mode
 
 
@@ -9,7 +12,10 @@ __all__ = [
     "AddScreen",
     "DeleteScreen",
     "EditScreen",
+    "MoveScreen",
     "SearchScreen",
+    "TagFilterScreen",
+    "TagScreen",
     "KeybindField",
     "Mode",
 ]
@@ -9,14 +9,23 @@ from .vault_types import Mode
 class DeleteScreen(ModalScreen[bool]):
     CSS_PATH = "styles/delete.tcss"
 
-    def __init__(self, mode: Mode) -> None:
+    def __init__(self, mode: Mode, count: int = 1) -> None:
         super().__init__()
         self.mode = mode
+        self.count = count
 
     def compose(self) -> ComposeResult:
+        if self.count > 1:
+            plural = (
+                "categories" if self.mode == Mode.CATEGORY else f"{self.mode.value}s"
+            )
+            target = f"these {self.count} {plural}"
+        else:
+            target = f"this {self.mode.value}"
+
         yield Grid(
             Label(
-                f"Are you sure you want to delete this {'category' if self.mode == Mode.CATEGORY else 'keybind'}?",
+                f"Are you sure you want to delete {target}?",
                 id="question",
             ),
             Button("Delete", variant="error", id="delete"),
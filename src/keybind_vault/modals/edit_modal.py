@@ -16,14 +16,14 @@ class EditScreen(ModalScreen[str | tuple[str, str]]):
         self.second = second
 
     def compose(self) -> ComposeResult:
-        is_category = self.mode == Mode.CATEGORY
+        is_single = self.mode != Mode.KEYBIND
         label_text = f"Edit {self.mode.value}"
         children = [
             Label(label_text, id="hint"),
             Input(self.first, id="input", disabled=False, valid_empty=False),
         ]
 
-        if not is_category:
+        if not is_single:
             children.append(
                 Input(self.second, id="description", disabled=False, valid_empty=False)
             )
@@ -38,7 +38,7 @@ class EditScreen(ModalScreen[str | tuple[str, str]]):
     def on_mount(self) -> None:
         # 12 17
         self.query_one("#edit-dialog").styles.height = (
-            12 if self.mode == Mode.CATEGORY else 17
+            17 if self.mode == Mode.KEYBIND else 12
         )
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
@@ -47,7 +47,7 @@ class EditScreen(ModalScreen[str | tuple[str, str]]):
         else:
             input = self.query_one("#input", Input)
 
-            if self.mode == Mode.CATEGORY:
+            if self.mode != Mode.KEYBIND:
                 self.dismiss(input.value)
             else:
                 description = self.query_one("#description", Input)
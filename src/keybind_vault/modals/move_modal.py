@@ -0,0 +1,36 @@
+from textual.app import ComposeResult
+from textual.containers import Grid
+from textual.screen import ModalScreen
+from textual.widgets import Button, Label, Select
+
+
+class MoveScreen(ModalScreen[int]):
+    CSS_PATH = "styles/move.tcss"
+
+    def __init__(self, categories: dict[int, str], count: int) -> None:
+        super().__init__()
+        self.categories = categories
+        self.count = count
+
+    def compose(self) -> ComposeResult:
+        yield Grid(
+            Label(
+                f"Move {self.count} keybind{'s' if self.count > 1 else ''} to",
+                id="label-help",
+            ),
+            Select(
+                [(name, cat_id) for cat_id, name in self.categories.items()],
+                prompt="Category",
+                id="target",
+            ),
+            Button("Move", variant="primary", id="move"),
+            Button("Cancel", id="cancel"),
+            id="move-dialog",
+        )
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "cancel":
+            self.dismiss(None)
+        else:
+            target = self.query_one("#target", Select)
+            self.dismiss(None if target.is_blank() else target.value)
@@ -0,0 +1,34 @@
+from textual.app import ComposeResult
+from textual.containers import Grid
+from textual.screen import ModalScreen
+from textual.widgets import Button, Label, SelectionList, Switch
+
+
+class TagFilterScreen(ModalScreen[tuple[list[int], bool]]):
+    CSS_PATH = "styles/tag_filter.tcss"
+
+    def __init__(self, tags: dict[int, str]) -> None:
+        super().__init__()
+        self.tags = tags
+
+    def compose(self) -> ComposeResult:
+        yield Grid(
+            Label("Filter by tags", id="label-help"),
+            SelectionList[int](
+                *[(name, tag_id) for tag_id, name in self.tags.items()],
+                id="tags",
+            ),
+            Label("Match all tags", id="match-all-label"),
+            Switch(value=True, id="match-all"),
+            Button("Filter", variant="primary", id="filter"),
+            Button("Cancel", id="cancel"),
+            id="tag-filter-dialog",
+        )
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "cancel":
+            self.dismiss(None)
+        else:
+            selected = self.query_one("#tags", SelectionList).selected
+            match_all = self.query_one("#match-all", Switch).value
+            self.dismiss((list(selected), match_all))
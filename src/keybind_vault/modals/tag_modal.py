@@ -0,0 +1,31 @@
+from textual.app import ComposeResult
+from textual.containers import Grid
+from textual.screen import ModalScreen
+from textual.widgets import Button, Input, Label
+
+
+class TagScreen(ModalScreen[list[str]]):
+    CSS_PATH = "styles/tag.tcss"
+
+    def __init__(self, count: int) -> None:
+        super().__init__()
+        self.count = count
+
+    def compose(self) -> ComposeResult:
+        yield Grid(
+            Label(
+                f"Tag {self.count} keybind{'s' if self.count > 1 else ''}",
+                id="label-help",
+            ),
+            Input(placeholder="Tags, comma separated", id="tags", valid_empty=False),
+            Button("Tag", variant="primary", id="tag"),
+            Button("Cancel", id="cancel"),
+            id="tag-dialog",
+        )
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "cancel":
+            self.dismiss(None)
+        else:
+            value = self.query_one("#tags", Input).value
+            self.dismiss([name.strip() for name in value.split(",") if name.strip()])
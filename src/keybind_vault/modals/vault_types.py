@@ -4,6 +4,7 @@ from enum import Enum
 class Mode(Enum):
     CATEGORY = "category"
     KEYBIND = "keybind"
+    DESCRIPTION = "description"
 
 
 class KeybindField(Enum):
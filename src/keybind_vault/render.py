@@ -0,0 +1,180 @@
+"""Printable cheat sheets of the vault in Markdown, HTML or plain text.
+
+Rows are streamed from one query through generators and written as they come,
+so memory use does not grow with the vault. Every render is also kept next to
+the vault, named after its options and the vault version it was made from;
+rendering an unchanged vault again only copies that file.
+"""
+
+import hashlib
+import html
+import os
+import shutil
+import sqlite3
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Optional, TextIO
+
+from keybind_vault.db.sqlite_db import (
+    CONFIG_DIR,
+    DB_PATH,
+    _connect,
+    _search_clause,
+    get_vault_version,
+)
+
+RENDER_CACHE_DIR = CONFIG_DIR / "renders"
+# Rows fetched from SQLite at a time
+FETCH_SIZE = 500
+# Width of the keys column in plain text, longer chords push their description
+TEXT_KEYS_WIDTH = 24
+
+Section = tuple[str, Iterator[sqlite3.Row]]
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    format: str = "md"
+    term: Optional[str] = None
+    fields: tuple[str, ...] = ("keys", "description")
+    category: Optional[str] = None
+
+    def cache_key(self, db_path: Path) -> str:
+        options = repr(
+            (str(db_path.resolve()), self.format, self.term, self.fields, self.category)
+        )
+        return hashlib.sha1(options.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_rows(
+    options: RenderOptions, path: Optional[Path] = None
+) -> Iterator[sqlite3.Row]:
+    """Every keybind to render with its category name, grouped by category."""
+    where, params = "1", []
+    if options.term:
+        # Same matching as search_keybinds
+        where, params = _search_clause(options.term, options.fields)
+    if options.category:
+        where += " AND c.name = ? COLLATE NOCASE"
+        params.append(options.category)
+
+    with closing(_connect(path)) as conn:
+        cursor = conn.execute(
+            f"""
+            SELECT c.name AS category, k.keys, k.description
+            FROM keybinds k
+            JOIN category c ON c.id = k.category_id
+            WHERE {where}
+            ORDER BY c.id, k.id
+        """,
+            params,
+        )
+        while rows := cursor.fetchmany(FETCH_SIZE):
+            yield from rows
+
+
+def iter_sections(rows: Iterable[sqlite3.Row]) -> Iterator[Section]:
+    # Rows arrive ordered by category, so each group is consumed as it streams
+    return groupby(rows, key=itemgetter("category"))
+
+
+def _markdown_cell(value: Optional[str]) -> str:
+    return (value or "").replace("|", "\\|").replace("\n", " ")
+
+
+def render_markdown(sections: Iterable[Section]) -> Iterator[str]:
+    yield "# Keybind Vault\n"
+    for category, rows in sections:
+        yield f"\n## {category}\n\n| Keys | Description |\n| --- | --- |\n"
+        for row in rows:
+            keys = _markdown_cell(row["keys"]).replace("`", "")
+            yield f"| `{keys}` | {_markdown_cell(row['description'])} |\n"
+
+
+def render_html(sections: Iterable[Section]) -> Iterator[str]:
+    yield (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        "<title>Keybind Vault</title>\n<style>\n"
+        "body { font-family: sans-serif; columns: 2; }\n"
+        "section { break-inside: avoid; }\n"
+        "table { border-collapse: collapse; width: 100%; }\n"
+        "td { padding: 2px 6px; border-bottom: 1px solid #ddd; }\n"
+        "kbd { font-family: monospace; font-weight: bold; }\n"
+        "</style>\n</head>\n<body>\n<h1>Keybind Vault</h1>\n"
+    )
+    for category, rows in sections:
+        yield f"<section>\n<h2>{html.escape(category)}</h2>\n<table>\n"
+        for row in rows:
+            yield (
+                f"<tr><td><kbd>{html.escape(row['keys'])}</kbd></td>"
+                f"<td>{html.escape(row['description'] or '')}</td></tr>\n"
+            )
+        yield "</table>\n</section>\n"
+    yield "</body>\n</html>\n"
+
+
+def render_text(sections: Iterable[Section]) -> Iterator[str]:
+    for position, (category, rows) in enumerate(sections):
+        if position:
+            yield "\n"
+        yield f"{category}\n{'=' * len(category)}\n"
+        for row in rows:
+            yield f"{row['keys']:<{TEXT_KEYS_WIDTH}}  {row['description'] or ''}\n"
+
+
+RENDERERS: dict[str, Callable[[Iterable[Section]], Iterator[str]]] = {
+    "md": render_markdown,
+    "html": render_html,
+    "txt": render_text,
+}
+
+
+def _cache_file(options: RenderOptions, db_path: Path, version: int) -> Path:
+    key = options.cache_key(db_path)
+    return RENDER_CACHE_DIR / f"{key}-{version}.{options.format}"
+
+
+def render(
+    output: TextIO,
+    options: RenderOptions,
+    path: Optional[Path] = None,
+    use_cache: bool = True,
+) -> bool:
+    """Writes the cheat sheet to `output`, returns whether it came from the cache."""
+    if not use_cache:
+        for chunk in RENDERERS[options.format](iter_sections(iter_rows(options, path))):
+            output.write(chunk)
+        return False
+
+    # Read first, a write while rendering leaves the result under an older version
+    cached = _cache_file(options, path or DB_PATH, get_vault_version(path))
+    if cached.exists():
+        with open(cached, encoding="utf-8", newline="") as file:
+            shutil.copyfileobj(file, output)
+        return True
+
+    RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=RENDER_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+            for chunk in RENDERERS[options.format](
+                iter_sections(iter_rows(options, path))
+            ):
+                output.write(chunk)
+                file.write(chunk)
+        os.replace(partial, cached)
+    except BaseException:
+        os.unlink(partial)
+        raise
+
+    # Renders of older versions are never read again
+    key = options.cache_key(path or DB_PATH)
+    for stale in RENDER_CACHE_DIR.glob(f"{key}-*.{options.format}"):
+        if stale != cached:
+            stale.unlink(missing_ok=True)
+    return False
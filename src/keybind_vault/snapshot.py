@@ -0,0 +1,388 @@
+"""Read-only compiled snapshot of the vault for tools that look up keybinds often.
+
+`compile_snapshot` writes every category and keybind into one flat binary file.
+`Snapshot` maps it into memory and answers exact and prefix lookups by binary
+search over the mapped indexes: nothing is parsed up front and fields are only
+decoded when they are read.
+
+Layout, all integers little-endian:
+
+    header      see HEADER
+    strings     UTF-8 string table, deduplicated
+    categories  CATEGORY records sorted by lower-cased name
+    keybinds    KEYBIND records grouped by category, in category order
+    key index   u32 keybind record numbers sorted by normalized keys
+"""
+
+import bisect
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+from collections.abc import Iterator, Sequence
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+from keybind_vault.db.sqlite_db import CONFIG_DIR, DB_PATH, _connect, get_vault_version
+
+SNAPSHOT_PATH = CONFIG_DIR / "keybindings.kvs"
+MAGIC = b"KBVS"
+FORMAT_VERSION = 1
+
+# magic, format version, vault version, db mtime_ns, db size, category count,
+# keybind count, strings offset, categories offset, keybinds offset, key index offset
+HEADER = struct.Struct("<4sHxxQqQIIIIII")
+# name offset, name length, first keybind, keybind count, category id
+CATEGORY = struct.Struct("<IIIII")
+# keys offset, keys length, normalized offset, normalized length,
+# description offset, description length, category record, keybind id
+KEYBIND = struct.Struct("<IIIIIIII")
+INDEX = struct.Struct("<I")
+# Where the db stamp lives in the header, patched in place when only usage changed
+STAMP = struct.Struct("<qQ")
+STAMP_OFFSET = 16
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def normalize_keys(keys: str) -> str:
+    """Case and spacing insensitive form of a key chord, "Ctrl + A" -> "ctrl+a"."""
+    return "".join(keys.lower().split())
+
+
+def _db_stamp(db_path: Path) -> tuple[int, int]:
+    stat = os.stat(db_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets: dict[str, tuple[int, int]] = {}
+
+    def add(self, value: Optional[str]) -> tuple[int, int]:
+        value = value or ""
+        if value not in self.offsets:
+            encoded = value.encode("utf-8")
+            self.offsets[value] = (len(self.data), len(encoded))
+            self.data += encoded
+        return self.offsets[value]
+
+
+def compile_snapshot(
+    output: Optional[Path] = None, db_path: Optional[Path] = None
+) -> Path:
+    """Writes a snapshot of the vault, the file is replaced atomically."""
+    output = output or SNAPSHOT_PATH
+    db_path = db_path or DB_PATH
+    vault_version = get_vault_version(db_path)
+    # Taken before reading so a write during compilation leaves the snapshot stale
+    mtime_ns, size = _db_stamp(db_path)
+
+    with closing(_connect(db_path)) as conn:
+        categories = conn.execute("SELECT id, name FROM category").fetchall()
+        keybinds: dict[int, list] = {category["id"]: [] for category in categories}
+        for row in conn.execute(
+            "SELECT id, keys, description, category_id FROM keybinds ORDER BY id"
+        ):
+            if row["category_id"] in keybinds:
+                keybinds[row["category_id"]].append(row)
+
+    strings = _StringTable()
+    category_records = bytearray()
+    keybind_records = bytearray()
+    normalized: list[tuple[str, int]] = []
+
+    ordered = sorted(categories, key=lambda c: (c["name"].lower(), c["id"]))
+    for category_index, category in enumerate(ordered):
+        rows = keybinds[category["id"]]
+        first = len(keybind_records) // KEYBIND.size
+        category_records += CATEGORY.pack(
+            *strings.add(category["name"]), first, len(rows), category["id"]
+        )
+
+        for row in rows:
+            norm = normalize_keys(row["keys"])
+            normalized.append((norm, len(keybind_records) // KEYBIND.size))
+            keybind_records += KEYBIND.pack(
+                *strings.add(row["keys"]),
+                *strings.add(norm),
+                *strings.add(row["description"]),
+                category_index,
+                row["id"],
+            )
+
+    normalized.sort()
+    key_index = b"".join(INDEX.pack(record) for _, record in normalized)
+
+    strings_offset = HEADER.size
+    categories_offset = strings_offset + len(strings.data)
+    keybinds_offset = categories_offset + len(category_records)
+    key_index_offset = keybinds_offset + len(keybind_records)
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        vault_version,
+        mtime_ns,
+        size,
+        len(ordered),
+        len(normalized),
+        strings_offset,
+        categories_offset,
+        keybinds_offset,
+        key_index_offset,
+    )
+
+    # A unique temporary file, several readers may find the snapshot stale at once
+    fd, partial = tempfile.mkstemp(dir=output.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for part in (
+                header,
+                strings.data,
+                category_records,
+                keybind_records,
+                key_index,
+            ):
+                file.write(part)
+        os.replace(partial, output)
+    except BaseException:
+        os.unlink(partial)
+        raise
+    return output
+
+
+def refresh_snapshot(
+    output: Optional[Path] = None, db_path: Optional[Path] = None
+) -> bool:
+    """Rebuilds an existing snapshot if the vault changed, returns whether it did.
+
+    Writes that do not touch categories or keybinds (usage counters, maintenance)
+    move the file stamp but not the vault version, so only the stamp is updated.
+    """
+    output = output or SNAPSHOT_PATH
+    db_path = db_path or DB_PATH
+    if not output.exists():
+        return False
+
+    try:
+        with Snapshot(output) as snapshot:
+            if not snapshot.is_stale(db_path):
+                return False
+            unchanged = snapshot.vault_version == get_vault_version(db_path)
+    except SnapshotError:
+        unchanged = False
+
+    if not unchanged:
+        compile_snapshot(output, db_path)
+        return True
+
+    with open(output, "r+b") as file:
+        file.seek(STAMP_OFFSET)
+        file.write(STAMP.pack(*_db_stamp(db_path)))
+    return False
+
+
+class SnapshotKeybind:
+    """A keybind inside the mapped file, its fields are decoded on access."""
+
+    __slots__ = ("_snapshot", "_record")
+
+    def __init__(self, snapshot: "Snapshot", record: int) -> None:
+        self._snapshot = snapshot
+        self._record = record
+
+    def _fields(self) -> tuple[int, ...]:
+        return KEYBIND.unpack_from(
+            self._snapshot._buffer,
+            self._snapshot._keybinds_offset + self._record * KEYBIND.size,
+        )
+
+    @property
+    def id(self) -> int:
+        return self._fields()[7]
+
+    @property
+    def keys(self) -> str:
+        fields = self._fields()
+        return self._snapshot._string(fields[0], fields[1])
+
+    @property
+    def description(self) -> str:
+        fields = self._fields()
+        return self._snapshot._string(fields[4], fields[5])
+
+    @property
+    def category(self) -> str:
+        return self._snapshot._category_name(self._fields()[6])
+
+    def __repr__(self) -> str:
+        return f"SnapshotKeybind(keys={self.keys!r}, category={self.category!r})"
+
+
+class _Records(Sequence):
+    """Sorted view over mapped records, so bisect can search it in place."""
+
+    def __init__(self, count: int, key) -> None:
+        self._count = count
+        self._key = key
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int):
+        return self._key(index)
+
+
+class Snapshot:
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or SNAPSHOT_PATH
+        with open(self.path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SnapshotError(f"{self.path} is empty") from e
+        self._buffer = memoryview(self._mmap)
+
+        if len(self._buffer) < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{self.path} is not a keybind vault snapshot")
+
+        (
+            magic,
+            version,
+            self.vault_version,
+            self._db_mtime_ns,
+            self._db_size,
+            self.category_count,
+            self.keybind_count,
+            self._strings_offset,
+            self._categories_offset,
+            self._keybinds_offset,
+            self._key_index_offset,
+        ) = HEADER.unpack_from(self._buffer)
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise SnapshotError(
+                f"{self.path} is not a version {FORMAT_VERSION} snapshot, compile it again"
+            )
+
+        self._by_keys = _Records(self.keybind_count, self._normalized_keys_at)
+        self._by_category = _Records(self.category_count, self._category_key_at)
+
+    def close(self) -> None:
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def is_stale(self, db_path: Optional[Path] = None) -> bool:
+        """Cheap check against the database file, SQLite is never opened."""
+        try:
+            stamp = _db_stamp(db_path or DB_PATH)
+        except FileNotFoundError:
+            return True
+        return stamp != (self._db_mtime_ns, self._db_size)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return str(self._buffer[start : start + length], "utf-8")
+
+    def _raw_string(self, offset: int, length: int) -> bytes:
+        start = self._strings_offset + offset
+        return self._mmap[start : start + length]
+
+    def _index_record(self, position: int) -> int:
+        return INDEX.unpack_from(
+            self._buffer, self._key_index_offset + position * INDEX.size
+        )[0]
+
+    def _normalized_keys_at(self, position: int) -> bytes:
+        fields = KEYBIND.unpack_from(
+            self._buffer,
+            self._keybinds_offset + self._index_record(position) * KEYBIND.size,
+        )
+        return self._raw_string(fields[2], fields[3])
+
+    def _category_fields(self, index: int) -> tuple[int, ...]:
+        return CATEGORY.unpack_from(
+            self._buffer, self._categories_offset + index * CATEGORY.size
+        )
+
+    def _category_name(self, index: int) -> str:
+        fields = self._category_fields(index)
+        return self._string(fields[0], fields[1])
+
+    def _category_key_at(self, index: int) -> bytes:
+        # Sorted by the lower-cased name, like the compiler
+        return self._category_name(index).lower().encode("utf-8")
+
+    def lookup(self, keys: str) -> list[SnapshotKeybind]:
+        """Every keybind bound to exactly this key chord, in any category."""
+        return list(self.prefix(keys, exact=True))
+
+    def prefix(
+        self, prefix: str, exact: bool = False, limit: Optional[int] = None
+    ) -> Iterator[SnapshotKeybind]:
+        """Keybinds whose normalized keys start with `prefix`, sorted by keys."""
+        target = normalize_keys(prefix).encode("utf-8")
+        position = bisect.bisect_left(self._by_keys, target)
+        found = 0
+
+        while position < self.keybind_count and (limit is None or found < limit):
+            keys = self._normalized_keys_at(position)
+            if keys != target if exact else not keys.startswith(target):
+                break
+            yield SnapshotKeybind(self, self._index_record(position))
+            position += 1
+            found += 1
+
+    def categories(self, prefix: str = "") -> Iterator[str]:
+        """Category names starting with `prefix`, case insensitive and sorted."""
+        target = prefix.lower().encode("utf-8")
+        position = bisect.bisect_left(self._by_category, target)
+        while position < self.category_count:
+            if not self._category_key_at(position).startswith(target):
+                break
+            yield self._category_name(position)
+            position += 1
+
+    def category(self, name: str) -> list[SnapshotKeybind]:
+        """The keybinds of one category, matched case insensitively."""
+        target = name.lower().encode("utf-8")
+        position = bisect.bisect_left(self._by_category, target)
+        if position == self.category_count or self._category_key_at(position) != target:
+            return []
+
+        _, _, first, count, _ = self._category_fields(position)
+        return [SnapshotKeybind(self, record) for record in range(first, first + count)]
+
+
+def open_snapshot(
+    path: Optional[Path] = None, db_path: Optional[Path] = None
+) -> Snapshot:
+    """Opens the snapshot, compiling it first if it is missing or out of date."""
+    path = path or SNAPSHOT_PATH
+    db_path = db_path or DB_PATH
+    if not db_path.exists():
+        # SQLite would create an empty file without any tables to read
+        raise SnapshotError(f"no vault at {db_path}")
+
+    try:
+        if not path.exists():
+            compile_snapshot(path, db_path)
+        else:
+            refresh_snapshot(path, db_path)
+    except sqlite3.Error as e:
+        raise SnapshotError(f"cannot read the vault: {e}") from e
+    return Snapshot(path)
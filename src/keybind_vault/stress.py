@@ -0,0 +1,247 @@
+"""Concurrent readers and writers against one vault, to tune the LockPolicy.
+
+Every worker runs a random mix of searches, category reads, inserts, edits and
+deletes for a fixed time, through the same functions the TUI uses, so the
+busy timeout and write retries are exercised exactly as they are in use.
+Workers are threads of this process, or separate processes like a script
+running next to the TUI. The db functions always open the configured vault,
+so the harness points DB_PATH at the scratch vault while it runs. A vault
+given to it is copied first, the run never writes to the original.
+"""
+
+import asyncio
+import io
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, nullcontext, redirect_stdout
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+from keybind_vault.db import sqlite_db
+from keybind_vault.db.sqlite_db import (
+    LockPolicy,
+    LockStats,
+    _connect,
+    _load_keybinds,
+    configure_locking,
+    delete_keybind,
+    get_lock_stats,
+    initialize,
+    insert_keybind,
+    reset_lock_stats,
+    search_keybinds,
+    update_keybind,
+)
+
+SEARCH_TERMS = ("ctrl", "shift", "alt", "tab", "save", "open")
+
+
+@dataclass
+class WorkerResult:
+    read_latencies: list[float] = field(default_factory=list)
+    write_latencies: list[float] = field(default_factory=list)
+    read_failed: int = 0
+    write_failed: int = 0
+    locks: LockStats = field(default_factory=LockStats)
+
+
+@dataclass
+class StressReport:
+    workers: int
+    processes: bool
+    seconds: float
+    policy: LockPolicy
+    reads: int
+    writes: int
+    # Reads that hit the busy timeout, and writes that gave up after every retry
+    read_failed: int
+    write_failed: int
+    lock_retries: int
+    lock_failures: int
+    read_p50: float
+    read_p99: float
+    write_p50: float
+    write_p99: float
+
+    @property
+    def throughput(self) -> float:
+        return (self.reads + self.writes) / self.seconds
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _seed_vault(vault: Path, workers: int, rows: int) -> list[int]:
+    """Gives every worker a category of its own, writers never delete each other's rows."""
+    initialize(vault)
+    with closing(_connect(vault)) as conn:
+        category_ids = []
+        for worker in range(workers):
+            conn.execute(
+                "INSERT OR IGNORE INTO category (name) VALUES (?)",
+                (f"stress-{worker}",),
+            )
+            category_ids.append(
+                conn.execute(
+                    "SELECT id FROM category WHERE name = ?", (f"stress-{worker}",)
+                ).fetchone()[0]
+            )
+        conn.executemany(
+            "INSERT INTO keybinds (keys, description, category_id) VALUES (?, ?, ?)",
+            [
+                (
+                    f"{SEARCH_TERMS[row % len(SEARCH_TERMS)]}+{row}",
+                    f"seeded {row}",
+                    category_ids[row % workers],
+                )
+                for row in range(rows)
+            ],
+        )
+        conn.commit()
+    return category_ids
+
+
+async def _work(
+    category_ids: list[int], own: int, seconds: float, write_ratio: float, seed: int
+) -> WorkerResult:
+    rng = random.Random(seed)
+    result = WorkerResult()
+    written: list[int] = []
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            choice = rng.random()
+            if written and choice < 0.25:
+                ok = await delete_keybind(written.pop(rng.randrange(len(written))), own)
+            elif written and choice < 0.6:
+                ok = await update_keybind(
+                    rng.choice(written), None, f"edited {start}", None
+                )
+            else:
+                keybind = await insert_keybind(
+                    f"{rng.choice(SEARCH_TERMS)}+{rng.randrange(10_000)}",
+                    "stress",
+                    own,
+                )
+                ok = keybind is not None
+                if keybind:
+                    written.append(keybind.id)
+            result.write_latencies.append(time.perf_counter() - start)
+            if not ok:
+                result.write_failed += 1
+        else:
+            try:
+                if rng.random() < 0.5:
+                    await search_keybinds(rng.choice(SEARCH_TERMS), limit=50)
+                else:
+                    # Straight from the database, the cache would hide contention
+                    _load_keybinds(rng.choice(category_ids))
+            except sqlite3.OperationalError:
+                result.read_failed += 1
+            result.read_latencies.append(time.perf_counter() - start)
+
+    return result
+
+
+def _run_worker(
+    vault: Path,
+    policy: LockPolicy,
+    category_ids: list[int],
+    worker: int,
+    seconds: float,
+    write_ratio: float,
+    quiet: bool,
+) -> WorkerResult:
+    # Already set up in threads, a fresh process still has to be pointed at the vault
+    sqlite_db.DB_PATH = vault
+    configure_locking(policy)
+    # Failed writes print their error, they are counted instead
+    with redirect_stdout(io.StringIO()) if quiet else nullcontext():
+        result = asyncio.run(
+            _work(category_ids, category_ids[worker], seconds, write_ratio, seed=worker)
+        )
+    result.locks = get_lock_stats()
+    return result
+
+
+def run_stress(
+    workers: int = 4,
+    seconds: float = 5.0,
+    write_ratio: float = 0.3,
+    processes: bool = False,
+    rows: int = 500,
+    policy: Optional[LockPolicy] = None,
+    vault: Optional[Path] = None,
+) -> StressReport:
+    """Runs the workers against a copy of `vault`, a fresh scratch vault if none is given."""
+    policy = policy or LockPolicy()
+    scratch = tempfile.TemporaryDirectory(prefix="keybind-vault-stress-")
+    target = Path(scratch.name) / "stress.db"
+    if vault is not None:
+        # Through the backup API, a consistent copy even while the TUI writes
+        with (
+            closing(sqlite3.connect(vault)) as source,
+            closing(sqlite3.connect(target)) as copy,
+        ):
+            source.backup(copy)
+    vault = target
+
+    previous_path, previous_policy = sqlite_db.DB_PATH, sqlite_db._lock_policy
+    try:
+        sqlite_db.reset_caches()
+        category_ids = _seed_vault(vault, workers, rows)
+        reset_lock_stats()
+        arguments = [
+            (vault, policy, category_ids, worker, seconds, write_ratio, processes)
+            for worker in range(workers)
+        ]
+
+        if processes:
+            # Spawned, so no worker inherits this process's connections or caches
+            with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+                results = list(pool.map(_run_worker, *zip(*arguments)))
+            retries = sum(result.locks.retries for result in results)
+            lock_failures = sum(result.locks.failures for result in results)
+        else:
+            # Threads share stdout, so it is silenced once around all of them
+            with ThreadPoolExecutor(workers) as pool, redirect_stdout(io.StringIO()):
+                results = list(pool.map(_run_worker, *zip(*arguments)))
+            # Threads share one counter
+            locks = get_lock_stats()
+            retries, lock_failures = locks.retries, locks.failures
+    finally:
+        sqlite_db.DB_PATH = previous_path
+        configure_locking(previous_policy)
+        sqlite_db.reset_caches()
+        scratch.cleanup()
+
+    reads = [latency for result in results for latency in result.read_latencies]
+    writes = [latency for result in results for latency in result.write_latencies]
+    return StressReport(
+        workers=workers,
+        processes=processes,
+        # Spawning processes is left out, every worker ran for exactly this long
+        seconds=seconds,
+        policy=policy,
+        reads=len(reads),
+        writes=len(writes),
+        read_failed=sum(result.read_failed for result in results),
+        write_failed=sum(result.write_failed for result in results),
+        lock_retries=retries,
+        lock_failures=lock_failures,
+        read_p50=_percentile(reads, 0.5),
+        read_p99=_percentile(reads, 0.99),
+        write_p50=_percentile(writes, 0.5),
+        write_p99=_percentile(writes, 0.99),
+    )
@@ -0,0 +1,75 @@
+"""How long the TUI takes to react, per kind of action.
+
+Each measured action records two durations: until its handler returned, and
+until the screen was repainted with the result. The gap between the two is the
+cost of the frame itself, which is what slow terminals and SSH sessions inflate.
+"""
+
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+
+# Samples kept per action
+TIMING_SAMPLES = 200
+# Repaints slower than this make the auto render mode drop animations
+SLOW_FRAME = 0.05
+# Frames measured before the auto render mode makes up its mind
+AUTO_DETECT_FRAMES = 5
+
+
+class RenderMode(Enum):
+    AUTO = "auto"
+    FULL = "full"
+    PERFORMANCE = "performance"
+
+
+@dataclass
+class TimingSummary:
+    action: str
+    count: int
+    handler_median: float
+    refresh_median: float
+    refresh_p95: float
+    refresh_max: float
+
+    @property
+    def frame_median(self) -> float:
+        return max(self.refresh_median - self.handler_median, 0.0)
+
+
+class ActionTimings:
+    def __init__(self) -> None:
+        self._handler: dict[str, deque[float]] = {}
+        self._refresh: dict[str, deque[float]] = {}
+        self._frames: deque[float] = deque(maxlen=AUTO_DETECT_FRAMES)
+
+    def record(self, action: str, handler: float, refresh: float) -> None:
+        self._handler.setdefault(action, deque(maxlen=TIMING_SAMPLES)).append(handler)
+        self._refresh.setdefault(action, deque(maxlen=TIMING_SAMPLES)).append(refresh)
+        self._frames.append(max(refresh - handler, 0.0))
+
+    def frames_are_slow(self) -> bool:
+        """Whether the last few repaints were consistently slow."""
+        return (
+            len(self._frames) == AUTO_DETECT_FRAMES
+            and statistics.median(self._frames) > SLOW_FRAME
+        )
+
+    def summary(self) -> list[TimingSummary]:
+        summaries = []
+        for action, refresh in sorted(self._refresh.items()):
+            ordered = sorted(refresh)
+            summaries.append(
+                TimingSummary(
+                    action=action,
+                    count=len(ordered),
+                    handler_median=statistics.median(self._handler[action]),
+                    refresh_median=statistics.median(ordered),
+                    refresh_p95=ordered[
+                        min(int(len(ordered) * 0.95), len(ordered) - 1)
+                    ],
+                    refresh_max=ordered[-1],
+                )
+            )
+        return summaries
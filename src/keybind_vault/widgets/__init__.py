@@ -0,0 +1,5 @@
+from .category_list import CategoryList
+
+__all__ = [
+    "CategoryList",
+]
@@ -0,0 +1,275 @@
+from bisect import bisect_left, insort
+from typing import Optional
+
+from rich.text import Text
+from textual import events
+from textual.binding import Binding
+from textual.message import Message
+from textual.widget import Widget
+from textual.widgets import Label
+
+# Sorts after any character a category name can start with
+_PREFIX_END = "\U0010ffff"
+
+
+class CategoryList(Widget, can_focus=True):
+    """Category sidebar that only ever mounts as many rows as fit on screen.
+
+    The rows are a fixed pool of labels that get new text as the list scrolls or
+    is filtered, so thousands of categories cost the same as a screenful.
+    Filtering goes through a sorted index of lower-cased names, a prefix search
+    is two binary searches.
+    """
+
+    DEFAULT_CSS = """
+    CategoryList {
+        background: $surface;
+        height: 1fr;
+        overflow: hidden hidden;
+
+        & > .category-item {
+            color: $foreground;
+            width: 1fr;
+            height: 1;
+            padding: 0 1;
+
+            &.-highlight {
+                color: $block-cursor-blurred-foreground;
+                background: $block-cursor-blurred-background;
+                text-style: $block-cursor-blurred-text-style;
+            }
+        }
+
+        &:focus {
+            background-tint: $foreground 5%;
+            & > .category-item.-highlight {
+                color: $block-cursor-foreground;
+                background: $block-cursor-background;
+                text-style: $block-cursor-text-style;
+            }
+        }
+    }
+    """
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Cursor up", show=False),
+        Binding("down", "cursor_down", "Cursor down", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+    ]
+
+    class Highlighted(Message):
+        """Posted when the highlighted category changes."""
+
+        def __init__(
+            self, category_list: "CategoryList", category_id: Optional[int]
+        ) -> None:
+            super().__init__()
+            self.category_list = category_list
+            self.category_id = category_id
+
+        @property
+        def control(self) -> "CategoryList":
+            return self.category_list
+
+    def __init__(self, id: Optional[str] = None) -> None:
+        super().__init__(id=id)
+        self._names: dict[int, str] = {}
+        self._counts: dict[int, int] = {}
+        # (lower-cased name, id), kept sorted for prefix searches
+        self._name_index: list[tuple[str, int]] = []
+        self._visible: list[int] = []
+        self._pool: list[Label] = []
+        self._offset = 0
+        self._index: Optional[int] = None
+        self._highlighted: Optional[int] = None
+
+    @property
+    def index(self) -> Optional[int]:
+        return self._index
+
+    @index.setter
+    def index(self, value: Optional[int]) -> None:
+        if value is not None:
+            if not self._visible:
+                value = None
+            else:
+                value = max(0, min(value, len(self._visible) - 1))
+
+        self._index = value
+        self._scroll_to_index()
+        self._refresh_rows()
+        if self.highlighted_id != self._highlighted:
+            self._highlighted = self.highlighted_id
+            self.post_message(self.Highlighted(self, self._highlighted))
+
+    @property
+    def highlighted_id(self) -> Optional[int]:
+        if self._index is None or self._index >= len(self._visible):
+            return None
+        return self._visible[self._index]
+
+    @property
+    def visible_ids(self) -> list[int]:
+        return list(self._visible)
+
+    def adjacent_ids(self, distance: int = 1) -> list[int]:
+        """The visible categories around the highlighted one, nearest first."""
+        if self._index is None:
+            return []
+        adjacent = []
+        for step in range(1, distance + 1):
+            for row in (self._index + step, self._index - step):
+                if 0 <= row < len(self._visible):
+                    adjacent.append(self._visible[row])
+        return adjacent
+
+    def set_categories(
+        self, categories: dict[int, str], counts: Optional[dict[int, int]] = None
+    ) -> None:
+        self._names = dict(categories)
+        self._counts = dict(counts or {})
+        self._name_index = sorted(
+            (name.lower(), cat_id) for cat_id, name in categories.items()
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        """Shows every category again."""
+        self._show(list(self._names))
+
+    def filter_prefix(self, prefix: str) -> None:
+        """Shows the categories whose name starts with `prefix`, ignoring case."""
+        prefix = prefix.lower()
+        start = bisect_left(self._name_index, (prefix,))
+        end = bisect_left(self._name_index, (prefix + _PREFIX_END,))
+        # Back to insertion order, which is id order
+        self._show(sorted(cat_id for _, cat_id in self._name_index[start:end]))
+
+    def show_only(self, category_ids: list[int]) -> None:
+        self._show([cat_id for cat_id in category_ids if cat_id in self._names])
+
+    def set_count(self, category_id: int, count: int) -> None:
+        if category_id not in self._names:
+            return
+        self._counts[category_id] = count
+        # Only the row showing it, if it is on screen at all
+        shown = self._visible[self._offset : self._offset + len(self._pool)]
+        if category_id in shown:
+            self._pool[shown.index(category_id)].update(self.format_row(category_id))
+
+    def add(self, category_id: int, name: str, count: int = 0) -> None:
+        self._names[category_id] = name
+        self._counts[category_id] = count
+        insort(self._name_index, (name.lower(), category_id))
+        self._visible.append(category_id)
+        self._refresh_rows()
+
+    def rename(self, category_id: int, name: str) -> None:
+        self._name_index.remove((self._names[category_id].lower(), category_id))
+        self._names[category_id] = name
+        insort(self._name_index, (name.lower(), category_id))
+        self._refresh_rows()
+
+    def remove(self, category_id: int) -> None:
+        name = self._names.pop(category_id, None)
+        self._counts.pop(category_id, None)
+        if name is None:
+            return
+        self._name_index.remove((name.lower(), category_id))
+        if category_id in self._visible:
+            self._visible.remove(category_id)
+            self.index = self._index
+
+    def format_row(self, category_id: int) -> Text:
+        return Text.assemble(
+            self._names[category_id],
+            (f" {self._counts.get(category_id, 0)}", "dim"),
+        )
+
+    def _show(self, category_ids: list[int]) -> None:
+        self._visible = category_ids
+        self._offset = 0
+        self.index = 0 if category_ids else None
+
+    def _scroll_to_index(self) -> None:
+        rows = max(len(self._pool), 1)
+        if self._index is None:
+            self._offset = 0
+        elif self._index < self._offset:
+            self._offset = self._index
+        elif self._index >= self._offset + rows:
+            self._offset = self._index - rows + 1
+        self._offset = max(0, min(self._offset, max(len(self._visible) - rows, 0)))
+
+    def _refresh_rows(self) -> None:
+        for position, label in enumerate(self._pool):
+            row = self._offset + position
+            if row < len(self._visible):
+                label.update(self.format_row(self._visible[row]))
+                label.set_class(row == self._index, "-highlight")
+                label.display = True
+            else:
+                label.display = False
+
+    async def on_resize(self, event: events.Resize) -> None:
+        rows = max(self.size.height, 1)
+        if rows > len(self._pool):
+            new_rows = [
+                Label("", classes="category-item")
+                for _ in range(rows - len(self._pool))
+            ]
+            self._pool.extend(new_rows)
+            await self.mount_all(new_rows)
+        elif rows < len(self._pool):
+            extra = self._pool[rows:]
+            del self._pool[rows:]
+            await self.remove_children(extra)
+
+        self._scroll_to_index()
+        self._refresh_rows()
+
+    def on_click(self, event: events.Click) -> None:
+        # Clicks bubble up from the row labels, so use screen coordinates
+        row = self._offset + event.screen_y - self.content_region.y
+        if 0 <= row < len(self._visible):
+            self.index = row
+
+    def on_mouse_scroll_down(self, event: events.MouseScrollDown) -> None:
+        self._scroll_by(1)
+        event.stop()
+
+    def on_mouse_scroll_up(self, event: events.MouseScrollUp) -> None:
+        self._scroll_by(-1)
+        event.stop()
+
+    def _scroll_by(self, rows: int) -> None:
+        limit = max(len(self._visible) - len(self._pool), 0)
+        self._offset = max(0, min(self._offset + rows, limit))
+        self._refresh_rows()
+
+    def action_cursor_up(self) -> None:
+        if self._index is not None and self._index > 0:
+            self.index = self._index - 1
+
+    def action_cursor_down(self) -> None:
+        if self._index is None:
+            self.index = 0
+        elif self._index < len(self._visible) - 1:
+            self.index = self._index + 1
+
+    def action_page_up(self) -> None:
+        if self._index is not None:
+            self.index = self._index - max(len(self._pool) - 1, 1)
+
+    def action_page_down(self) -> None:
+        if self._index is not None:
+            self.index = self._index + max(len(self._pool) - 1, 1)
+
+    def action_first(self) -> None:
+        self.index = 0
+
+    def action_last(self) -> None:
+        self.index = len(self._visible) - 1